@@ -1,17 +1,113 @@
-from collections import deque
+import os
+import tempfile
+from itertools import islice
 
-def bfs(graph, start):
-    visited = set()
-    queue = deque([start])
+# bfs_levels: frontier-at-a-time BFS returning dense dist/parent arrays
+# multi_source_bfs: bfs_levels from many sources over a process pool
+from csr_graph import CSRGraph, bfs_levels, multi_source_bfs
+# write_csr_file / load_csr_file: binary CSR format, memory-mapped on load
+from csr_graph import load_csr_file, write_csr_file
+from search_stats import SearchStats
+# bfs_iter: lazy BFS over dict, CSR or implicit (successor function) graphs
+from traversal import ImplicitGraph, bfs_iter, successor_function
 
+def shortest_path(graph, source, target, reverse=None):
+    # Bidirectional BFS: grow one frontier from each end, a whole level at
+    # a time (always the smaller one), and stop as soon as they meet.
+    # `reverse` gives every node's predecessors; pass the graph itself for
+    # undirected graphs. By default:
+    #   CSR graphs      : graph.reversed(), built once and cached
+    #   adjacency dicts : reverse_adjacency(graph), an O(V + E) pass on
+    #                     every call, so build it once for many queries
+    #   implicit graphs : no default, `reverse` must be given
+    # For CSR graphs `reverse` must itself be a CSRGraph over the same ids;
+    # otherwise it can be any graph form (dict, CSR, successor function).
+    # Returns (path, nodes_expanded), path is None if target is unreachable.
+    if isinstance(graph, CSRGraph):
+        if reverse is None:
+            reverse = graph.reversed()
+        elif not isinstance(reverse, CSRGraph):
+            raise ValueError("The reverse of a CSR graph must be a CSRGraph")
+        path, expanded = _bidirectional_bfs(
+            lambda node: graph.neighbors(node).tolist(),
+            lambda node: reverse.neighbors(node).tolist(),
+            graph.id_of(source), graph.id_of(target))
+        if path is not None:
+            path = [graph.label_of(node) for node in path]
+        return path, expanded
+
+    if reverse is None:
+        if not hasattr(graph, "items"):
+            raise ValueError("shortest_path needs `reverse` for implicit graphs")
+        predecessors = reverse_adjacency(graph)
+        reverse = lambda node: predecessors.get(node, ())
+    return _bidirectional_bfs(successor_function(graph), successor_function(reverse),
+                              source, target)
+
+def reverse_adjacency(graph):
+    # Predecessor dict of an adjacency dict: {node: [nodes pointing to it]}
+    reverse = {node: [] for node in graph}
+    for node, neighbors in graph.items():
+        for neighbor in neighbors:
+            reverse.setdefault(neighbor, []).append(node)
+    return reverse
+
+def _bidirectional_bfs(successors, predecessors, source, target):
+    if source == target:
+        return [source], 0
+
+    # Parent maps: forward points back toward source, backward toward target
+    forward_parent = {source: None}
+    backward_parent = {target: None}
+    forward, backward = [source], [target]
+    expanded = 0
+
+    while forward and backward:
+        if len(forward) <= len(backward):
+            frontier, step, seen, other = forward, successors, forward_parent, backward_parent
+        else:
+            frontier, step, seen, other = backward, predecessors, backward_parent, forward_parent
+
+        next_frontier = []
+        for node in frontier:
+            expanded += 1
+            for neighbor in step(node):
+                if neighbor in seen:
+                    continue
+                seen[neighbor] = node
+
+                # The first meeting point already lies on a shortest path
+                if neighbor in other:
+                    return _join_paths(forward_parent, backward_parent, neighbor), expanded
+                next_frontier.append(neighbor)
+
+        if frontier is forward:
+            forward = next_frontier
+        else:
+            backward = next_frontier
+
+    return None, expanded
+
+def _join_paths(forward_parent, backward_parent, meet):
+    # Walk back from the meeting node to the source, then on to the target
+    path = []
+    node = meet
+    while node is not None:
+        path.append(node)
+        node = forward_parent[node]
+    path.reverse()
+
+    node = backward_parent[meet]
+    while node is not None:
+        path.append(node)
+        node = backward_parent[node]
+    return path
+
+def bfs(graph, start, stats=None):
+    # Printing wrapper around bfs_iter (stats: optional SearchStats)
     print("BFS Traversal Order:", end=' ')
-    
-    while queue:
-        node = queue.popleft()
-        if node not in visited:
-            print(node, end=' ')
-            visited.add(node)
-            queue.extend(neighbor for neighbor in graph[node] if neighbor not in visited)
+    for node in bfs_iter(graph, start, stats=stats):
+        print(node, end=' ')
 
 # Example usage:
 if __name__ == "__main__":
@@ -24,4 +120,47 @@ if __name__ == "__main__":
         'F' : []
     }
 
-    bfs(graph, 'A')
\ No newline at end of file
+    stats = SearchStats()
+    bfs(graph, 'A', stats=stats)
+    print()
+    print("BFS stats:", stats)
+
+    # Same traversal over the compact CSR representation
+    bfs(CSRGraph.from_dict(graph), 'A')
+    print()
+
+    # Consume the traversal directly, with depth and parent of each node
+    for node, depth, parent in bfs_iter(graph, 'A', with_info=True):
+        print(node, "depth:", depth, "parent:", parent)
+    print()
+
+    # Whole-level expansion with dense distance / parent arrays
+    csr = CSRGraph.from_dict(graph)
+    dist, parent = bfs_levels(csr, 'A')
+    for node_id, label in enumerate(csr):
+        up = parent[node_id]
+        print(label, "dist:", dist[node_id], "parent:", csr.label_of(up) if up >= 0 else None)
+    print()
+
+    # Shortest path query from A to F
+    path, expanded = shortest_path(graph, 'A', 'F')
+    print("Shortest path A -> F:", path, "nodes expanded:", expanded)
+    print()
+
+    # Distance matrix from several sources at once, one row per source
+    sources = ['A', 'B', 'C']
+    matrix = multi_source_bfs(csr, sources, workers=2)
+    print("Distance matrix (columns:", list(csr), ")")
+    for source, row in zip(sources, matrix):
+        print(source, row)
+    print()
+
+    # Implicit graph: successors generated on demand, traversal stopped early
+    numbers = ImplicitGraph(lambda n: [n + 1, n * 2])
+    print("BFS over n -> n + 1, 2n from 1:", list(islice(bfs_iter(numbers, 1), 8)))
+
+    # Binary CSR file, memory-mapped back without parsing or copying
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "graph.csr")
+        write_csr_file(csr, path)
+        bfs(load_csr_file(path), 'A')
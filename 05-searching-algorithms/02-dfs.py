@@ -1,15 +1,240 @@
-def dfs(graph, start):
-    visited = set()
-    stack = [start]
+import dbm
+import os
+import pickle
+import shutil
+import tempfile
 
-    print("DFS Traversal Order:", end=' ')
+import numpy as np
+
+from csr_graph import CSRGraph
+# dfs_iter: lazy DFS over dict, CSR or implicit (successor function) graphs
+from traversal import dfs_iter, successor_function
+
+###################### MEMORY-BOUNDED DFS ######################
+# Depth-limited and iterative-deepening DFS keep one neighbour iterator per
+# level of the current path, so memory grows with depth, not graph size.
+# Without a visited set, cycles are only cut along the current path.
+# With memory_budget set, a visited map (node -> shallowest depth seen)
+# also prunes repeated states: up to memory_budget entries stay in memory
+# and older ones spill to a disk-backed dbm file.
+
+class SpillingVisited:
+    """Visited map of node -> shallowest depth, spilling to disk when full"""
+
+    def __init__(self, memory_budget, path=None):
+        self.memory_budget = memory_budget
+        self.memory = {}
+        self.path = path
+        self.disk = None
+        self._tmpdir = None
+
+    def first_visit(self, node, depth):
+        # True (and record it) unless node was already seen at <= depth
+        known = self.memory.get(node)
+        if known is None and self.disk is not None:
+            stored = self.disk.get(pickle.dumps(node))
+            if stored is not None:
+                known = int(stored)
+        if known is not None and known <= depth:
+            return False
+
+        if node not in self.memory and len(self.memory) >= self.memory_budget:
+            self._spill()
+        self.memory[node] = depth
+        return True
+
+    def _spill(self):
+        if self.disk is None:
+            if self.path is None:
+                self._tmpdir = tempfile.mkdtemp(prefix="dfs-visited-")
+                self.path = os.path.join(self._tmpdir, "visited")
+            self.disk = dbm.open(self.path, "n")
+        for node, depth in self.memory.items():
+            self.disk[pickle.dumps(node)] = str(depth)
+        self.memory.clear()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+_DONE = object()
+
+def _depth_limited(graph, start, limit, visited, report):
+    # Yields (node, path) in DFS order for nodes within `limit` edges, where
+    # `path` is the live list of nodes from start to node. Sets
+    # report['cutoff'] when some node was left unexpanded by the limit.
+    successors = successor_function(graph)
+    path = [start]
+    on_path = {start}
+    if visited is not None:
+        visited.first_visit(start, 0)
+    yield start, path
+
+    if limit <= 0:
+        report['cutoff'] = True
+        return
+
+    # stack[i] iterates the neighbours of path[i]
+    stack = [iter(successors(start))]
 
     while stack:
-        node = stack.pop()
-        if node not in visited:
-            print(node, end=' ')
-            visited.add(node)
-            stack.extend(reversed([neighbor for neighbor in graph[node] if neighbor not in visited]))
+        neighbor = next(stack[-1], _DONE)
+        if neighbor is _DONE:
+            stack.pop()
+            on_path.discard(path.pop())
+            continue
+
+        depth = len(path)
+        if neighbor in on_path:
+            continue
+        if visited is not None and not visited.first_visit(neighbor, depth):
+            continue
+
+        path.append(neighbor)
+        on_path.add(neighbor)
+        yield neighbor, path
+
+        if depth < limit:
+            stack.append(iter(successors(neighbor)))
+        else:
+            report['cutoff'] = True
+            on_path.discard(path.pop())
+
+def depth_limited_dfs_iter(graph, start, limit, with_info=False, memory_budget=None, spill_path=None):
+    # Lazily yield nodes within `limit` edges of start in DFS order, or
+    # (node, depth, parent) tuples when with_info is set. Without a
+    # memory_budget, nodes reachable along several paths repeat.
+    visited = None if memory_budget is None else SpillingVisited(memory_budget, spill_path)
+    try:
+        for node, path in _depth_limited(graph, start, limit, visited, {}):
+            if with_info:
+                yield node, len(path) - 1, path[-2] if len(path) > 1 else None
+            else:
+                yield node
+    finally:
+        if visited is not None:
+            visited.close()
+
+def iddfs(graph, start, goal, max_depth=None, memory_budget=None, spill_path=None):
+    # Iterative deepening: depth-limited DFS with limits 0, 1, 2, ... until
+    # goal is found. Returns the (shortest) path to goal, or None once the
+    # limit no longer cuts anything off or max_depth is exceeded.
+    limit = 0
+    while max_depth is None or limit <= max_depth:
+        report = {'cutoff': False}
+        visited = None if memory_budget is None else SpillingVisited(memory_budget, spill_path)
+        try:
+            for node, path in _depth_limited(graph, start, limit, visited, report):
+                if node == goal:
+                    return list(path)
+        finally:
+            if visited is not None:
+                visited.close()
+
+        if not report['cutoff']:
+            return None
+        limit += 1
+
+    return None
+
+###################### STRONGLY CONNECTED COMPONENTS ######################
+# Iterative Tarjan over a CSRGraph (build one with CSRGraph.from_dict):
+# an explicit call stack of (node, next edge position) replaces recursion,
+# so millions of nodes never hit Python's recursion limit. Per-node state
+# lives in flat arrays, accessed through memoryviews for fast scalar reads.
+
+def strongly_connected_components(graph):
+    # Returns (num_components, component) where component[i] is the
+    # component id of node id i. Tarjan emits components in reverse
+    # topological order of the condensation: every edge goes from a
+    # component to one with an equal or smaller id.
+    n = graph.num_nodes
+    offsets = memoryview(graph.offsets)
+    targets = memoryview(graph.targets)
+
+    component = np.full(n, -1, dtype=graph.targets.dtype)
+    index_array = np.full(n, -1, dtype=np.int64)
+    low_array = np.zeros(n, dtype=np.int64)
+    comp, index, low = memoryview(component), memoryview(index_array), memoryview(low_array)
+    on_stack = bytearray(n)
+
+    stack = []
+    counter = 0
+    count = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        call_nodes, call_edges = [root], [offsets[root]]
+
+        while call_nodes:
+            node = call_nodes[-1]
+            edge, end = call_edges[-1], offsets[node + 1]
+
+            while edge < end:
+                neighbor = targets[edge]
+                edge += 1
+                if index[neighbor] == -1:
+                    # Descend into neighbor, resume this node at `edge` later
+                    call_edges[-1] = edge
+                    index[neighbor] = low[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack[neighbor] = 1
+                    call_nodes.append(neighbor)
+                    call_edges.append(offsets[neighbor])
+                    break
+                if on_stack[neighbor] and index[neighbor] < low[node]:
+                    low[node] = index[neighbor]
+            else:
+                # All edges done: node is finished
+                call_nodes.pop()
+                call_edges.pop()
+
+                # A root of a component pops the whole component off the stack
+                if low[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        comp[member] = count
+                        if member == node:
+                            break
+                    count += 1
+
+                if call_nodes:
+                    caller = call_nodes[-1]
+                    if low[node] < low[caller]:
+                        low[caller] = low[node]
+
+    return count, component
+
+def topological_sort(graph):
+    # Node ids of a DAG (CSRGraph) in topological order, as an array.
+    # Raises ValueError if the graph has a cycle.
+    count, component = strongly_connected_components(graph)
+    sources = np.repeat(np.arange(graph.num_nodes), np.diff(graph.offsets))
+    if count < graph.num_nodes or np.any(sources == graph.targets):
+        raise ValueError("Graph has a cycle, no topological order exists")
+
+    # Each node is its own component, numbered in reverse topological order
+    order = np.empty(graph.num_nodes, dtype=graph.targets.dtype)
+    order[count - 1 - component] = np.arange(graph.num_nodes)
+    return order
+
+def dfs(graph, start, stats=None):
+    # Printing wrapper around dfs_iter (stats: optional SearchStats)
+    print("DFS Traversal Order:", end=' ')
+    for node in dfs_iter(graph, start, stats=stats):
+        print(node, end=' ')
 
 # Example usage:
 if __name__ == "__main__":
@@ -23,3 +248,24 @@ if __name__ == "__main__":
     }
 
     dfs(graph, 'A')
+    print()
+
+    # Same traversal over the compact CSR representation
+    dfs(CSRGraph.from_dict(graph), 'A')
+    print()
+
+    # Consume the traversal directly, with depth and parent of each node
+    for node, depth, parent in dfs_iter(graph, 'A', with_info=True):
+        print(node, "depth:", depth, "parent:", parent)
+    print()
+
+    # Iterative deepening with memory linear in depth
+    print("IDDFS path A -> F:", iddfs(graph, 'A', 'F'))
+    print("Depth-limited DFS (limit 1):", list(depth_limited_dfs_iter(graph, 'A', 1)))
+
+    # Components and topological order over the CSR representation
+    csr = CSRGraph.from_dict(graph)
+    print("Topological order:", [csr.label_of(i) for i in topological_sort(csr)])
+    cyclic = CSRGraph.from_dict({'A': ['B'], 'B': ['C'], 'C': ['A', 'D'], 'D': []})
+    count, component = strongly_connected_components(cyclic)
+    print("Components:", count, dict(zip(cyclic, component.tolist())))
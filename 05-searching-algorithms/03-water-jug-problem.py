@@ -8,76 +8,336 @@
         # Empty a jug
         # Pour water from one jug to another
 
-from collections import deque
+from collections import deque, namedtuple
+from functools import lru_cache, reduce
+from math import gcd
 
-def water_jug_problem(capacity_a, capacity_b, target):
-    # Set to keep track of already visited states
-    # Each state is represented as (water_in_jug_A, water_in_jug_B)
-    visited = set()
+from search_engine import SearchResult, astar
+from search_stats import SearchStats
+from traversal import ImplicitGraph, bfs_iter
 
-    # Queue for BFS
-    # Each element contains: (current_state_A, current_state_B, path_taken)
-    queue = deque()
+def water_jug_problem(capacity_a, capacity_b, target, stats=None):
+    # Pass stats=SearchStats() to record expansions, peak queue length and
+    # time per BFS level
 
-    # Initial state: both jugs are empty
-    queue.append((0, 0, []))
+    # Impossible targets are rejected up front, without any search
+    if not is_solvable((capacity_a, capacity_b), target):
+        return None
 
-    # Continue BFS until queue is empty
-    while queue:
-        # Remove the front state from the queue
-        a, b, path = queue.popleft()
+    # Each state (water_in_jug_A, water_in_jug_B) is packed into one integer
+    #   state = a * (capacity_b + 1) + b
+    width = capacity_b + 1
+
+    # Parent map: state -> state it was first reached from (-1 for the start)
+    # Only states with one jug empty or full are reachable, about 2 * (A + B)
+    # of them, so a dict stays far smaller than a flat (A + 1) * (B + 1) array
+    parent = {}
+
+    # The goal is tested when a state is generated, not when it is dequeued,
+    # so the search stops a whole BFS level earlier: the successor function
+    # records the first (state, goal successor) pair it produces
+    found = []
+
+    def check_goal(state, next_states):
+        if found:
+            return
+        for next_state in next_states:
+            a, b = divmod(next_state, width)
+            if a == target or b == target:
+                found.append((state, next_state))
+                return
+
+    # BFS over the implicit state graph: next states are generated on
+    # demand, the shared traversal core handles the queue and visited set
+    for state, depth, up in bfs_iter(jug_state_graph(capacity_a, capacity_b, check_goal), 0,
+                                     with_info=True, stats=stats):
+        if found:
+            break
+        parent[state] = -1 if up is None else up
+
+        # The start state itself is only a goal for target 0
+        if up is None and target == 0:
+            return _rebuild_path(parent, state, width)
+
+    # If the target amount is found in either jug, rebuild the path once
+    # by following parents back to the start
+    if found:
+        up, state = found[0]
+        parent[state] = up
+        return _rebuild_path(parent, state, width)
+
+    # If BFS completes without finding target
+    return None
+
+def jug_state_graph(capacity_a, capacity_b, on_generate=None):
+    # Implicit graph over packed states, successors built on the fly;
+    # on_generate(state, next_states) sees every successor list as it is
+    # built, e.g. to test for goals at generation time
+    width = capacity_b + 1
+
+    def successors(state):
+        a, b = divmod(state, width)
+        next_states = [next_a * width + next_b
+                       for next_a, next_b in _next_states(a, b, capacity_a, capacity_b)]
+        if on_generate is not None:
+            on_generate(state, next_states)
+        return next_states
+
+    return ImplicitGraph(successors)
+
+def _next_states(a, b, capacity_a, capacity_b):
+    # Amount poured is the minimum of:
+    #   - water available in the source jug
+    #   - remaining capacity in the other jug
+    pour_ab = min(a, capacity_b - b)
+    pour_ba = min(b, capacity_a - a)
+
+    return [
+
+        # Fill Jug A completely
+        (capacity_a, b),
+
+        # Fill Jug B completely
+        (a, capacity_b),
+
+        # Empty Jug A
+        (0, b),
+
+        # Empty Jug B
+        (a, 0),
+
+        # Pour water from Jug A to Jug B
+        (a - pour_ab, b + pour_ab),
+
+        # Pour water from Jug B to Jug A
+        (a + pour_ba, b - pour_ba)
+    ]
+
+def _rebuild_path(parent, state, width):
+    path = []
+    while state != -1:
+        path.append(divmod(state, width))
+        state = parent[state]
+    path.reverse()
+    return path
+
+###################### ALL-TARGETS DISTANCE TABLE ######################
+# One full BFS per capacity pair records, for every reachable state, its
+# distance from (0, 0) and its parent. Any target query is then a lookup
+# plus a path walk. Tables live in a bounded LRU cache keyed by capacities.
+
+# Number of capacity pairs kept in the table cache
+TABLE_CACHE_SIZE = 32
+
+# width     : packing base, state = a * width + b
+# parent    : state -> parent state (-1 for the start)
+# distance  : state -> number of operations from (0, 0)
+# reached   : amount -> first state (in BFS order) holding it in either jug
+JugTable = namedtuple("JugTable", ["width", "parent", "distance", "reached"])
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def water_jug_table(capacity_a, capacity_b):
+    width = capacity_b + 1
+    parent = {}
+    distance = {}
+    reached = {}
+
+    for state, depth, up in bfs_iter(jug_state_graph(capacity_a, capacity_b), 0, with_info=True):
+        parent[state] = -1 if up is None else up
+        distance[state] = depth
+
+        # BFS order matches water_jug_problem, so the same goal state
+        # (and path) is returned for every target
+        a, b = divmod(state, width)
+        reached.setdefault(a, state)
+        reached.setdefault(b, state)
+
+    return JugTable(width, parent, distance, reached)
 
-        # If the target amount is found in either jug
+def water_jug_lookup(capacity_a, capacity_b, target):
+    # Same result as water_jug_problem, answered from the cached table
+    table = water_jug_table(capacity_a, capacity_b)
+    state = table.reached.get(target)
+    if state is None:
+        return None
+    return _rebuild_path(table.parent, state, table.width)
+
+def water_jug_batch(capacity_a, capacity_b, targets):
+    # Answer many targets with one table: {target: path or None}
+    return {target: water_jug_lookup(capacity_a, capacity_b, target) for target in targets}
+
+###################### INFORMED SEARCH ######################
+# The two-jug problem on the generic search engine (A*, IDA*, greedy),
+# with unit step costs and packed integer states.
+
+def water_jug_heuristic(capacity_a, capacity_b, target):
+    # Admissible and consistent lower bound on the remaining steps:
+    #   0 at a goal
+    #   1 if filling a jug gives the target, or the total water already
+    #     equals that of some goal state, so a single pour may finish
+    #   2 otherwise, since pours keep the total and fills / empties only
+    #     leave a jug empty or full
+    # Reachable states always have a jug empty or full, so a goal state
+    # holds a total of target, target + A or target + B
+    width = capacity_b + 1
+    one_fill = target in (capacity_a, capacity_b)
+    goal_totals = {target, target + capacity_a, target + capacity_b}
+
+    def heuristic(state):
+        a, b = divmod(state, width)
         if a == target or b == target:
-            # Add final state to path and return solution
-            path.append((a, b))
-            return path
+            return 0
+        if one_fill or a + b in goal_totals:
+            return 1
+        return 2
 
-        # Skip state if already visited
-        if (a, b) in visited:
-            continue
+    return heuristic
 
-        # Mark current state as visited
-        visited.add((a, b))
+def water_jug_search(capacity_a, capacity_b, target, search=astar, informed=True):
+    # Solve with `search` (astar, greedy_best_first or ida_star); with
+    # informed=False the heuristic is 0 and A* degrades to plain BFS order.
+    # Returns a SearchResult whose path holds (a, b) tuples.
+    if not is_solvable((capacity_a, capacity_b), target):
+        return SearchResult(None, None, 0)
 
-        # Add current state to the path
-        path = path + [(a, b)]
+    width = capacity_b + 1
 
-        # Generate all possible next states using allowed operations
-        next_states = [
+    def successors(state):
+        a, b = divmod(state, width)
+        return [(next_a * width + next_b, 1)
+                for next_a, next_b in _next_states(a, b, capacity_a, capacity_b)]
 
-            # Fill Jug A completely
-            (capacity_a, b),
+    def is_goal(state):
+        a, b = divmod(state, width)
+        return a == target or b == target
 
-            # Fill Jug B completely
-            (a, capacity_b),
+    if informed:
+        heuristic = water_jug_heuristic(capacity_a, capacity_b, target)
+    else:
+        heuristic = lambda state: 0
 
-            # Empty Jug A
-            (0, b),
+    # No num_states: only about 2 * (A + B) states are reachable, so a set
+    # closed set stays far smaller than a bitmap over all (A + 1) * (B + 1)
+    result = search(0, successors, is_goal, heuristic)
 
-            # Empty Jug B
-            (a, 0),
+    if result.path is None:
+        return result
+    return result._replace(path=[divmod(state, width) for state in result.path])
 
-            # Pour water from Jug A to Jug B
-            # Amount poured is the minimum of:
-            #   - water available in A
-            #   - remaining capacity in B
-            (a - min(a, capacity_b - b),
-             b + min(a, capacity_b - b)),
+###################### GENERALIZED N-JUG PROBLEM ######################
+# Every amount a jug can ever hold is a multiple of gcd(capacities)
+# (Bezout's identity), and every such multiple up to the largest capacity
+# can be measured, so feasibility is decided before any search.
 
-            # Pour water from Jug B to Jug A
-            (a + min(b, capacity_a - a),
-             b - min(b, capacity_a - a))
-        ]
+def is_solvable(capacities, target):
+    if target == 0:
+        return True
+    divisor = reduce(gcd, capacities, 0)
+    return divisor > 0 and 0 < target <= max(capacities) and target % divisor == 0
 
-        # Add all unvisited next states to the BFS queue
-        for state in next_states:
-            if state not in visited:
-                queue.append((state[0], state[1], path))
+def two_jug_steps(capacity_a, capacity_b, target):
+    # Closed-form fast path for two jugs: keep pouring one jug into the
+    # other, filling the source when empty and emptying the destination
+    # when full. The shorter of the two directions is a shortest solution.
+    if not is_solvable((capacity_a, capacity_b), target):
+        return None
+
+    a_to_b = _pour_sequence(capacity_a, capacity_b, target)
+    b_to_a = _pour_sequence(capacity_b, capacity_a, target)
+    if b_to_a is not None:
+        b_to_a = [(a, b) for b, a in b_to_a]
+
+    return min((steps for steps in (a_to_b, b_to_a) if steps is not None), key=len)
+
+def _pour_sequence(capacity_x, capacity_y, target):
+    # An empty source jug can never deliver water
+    if capacity_x == 0 and target != 0:
+        return None
+
+    x = y = 0
+    steps = [(0, 0)]
+    while x != target and y != target:
+        if x == 0:
+            x = capacity_x
+        elif y == capacity_y:
+            y = 0
+        else:
+            poured = min(x, capacity_y - y)
+            x, y = x - poured, y + poured
+        steps.append((x, y))
+    return steps
+
+def water_jug_problem_n(capacities, target):
+    # Jugs with arbitrary capacities; returns the list of states (tuples of
+    # amounts, one per jug) from all-empty to a state holding `target`
+    capacities = tuple(capacities)
+
+    # Impossible targets are rejected up front, without any search
+    if not is_solvable(capacities, target):
+        return None
+
+    # Two jugs: closed-form fast path
+    if len(capacities) == 2:
+        return two_jug_steps(capacities[0], capacities[1], target)
+
+    if target == 0:
+        return [(0,) * len(capacities)]
+
+    # Mixed-radix packing: digit i is the water in jug i, in base
+    # capacity_i + 1, so every state is one integer
+    weights = [1] * len(capacities)
+    for i in range(len(capacities) - 2, -1, -1):
+        weights[i] = weights[i + 1] * (capacities[i + 1] + 1)
+
+    # Parent map for the path, which doubles as the visited set: only the
+    # reachable states get an entry, far fewer than all packed states
+    parent = {0: -1}
+
+    queue = deque([0])
+    jugs = range(len(capacities))
+
+    while queue:
+        state = queue.popleft()
+        amounts = _unpack(state, capacities)
+
+        # (next_state, new amount in one changed jug, in the other)
+        next_states = []
+        for i in jugs:
+            # Fill jug i / empty jug i
+            next_states.append((state + (capacities[i] - amounts[i]) * weights[i], capacities[i], 0))
+            next_states.append((state - amounts[i] * weights[i], 0, 0))
+
+            # Pour jug i into jug j
+            for j in jugs:
+                if i != j:
+                    poured = min(amounts[i], capacities[j] - amounts[j])
+                    next_states.append((state + poured * (weights[j] - weights[i]),
+                                        amounts[i] - poured, amounts[j] + poured))
+
+        for next_state, changed_x, changed_y in next_states:
+            # Visited check at enqueue time keeps each state in the queue once
+            if next_state in parent:
+                continue
+            parent[next_state] = state
+
+            if changed_x == target or changed_y == target:
+                path = []
+                while next_state != -1:
+                    path.append(tuple(_unpack(next_state, capacities)))
+                    next_state = parent[next_state]
+                path.reverse()
+                return path
+
+            queue.append(next_state)
 
-    # If BFS completes without finding target
     return None
 
+def _unpack(state, capacities):
+    amounts = [0] * len(capacities)
+    for i in range(len(capacities) - 1, -1, -1):
+        state, amounts[i] = divmod(state, capacities[i] + 1)
+    return amounts
+
 # Example usage:
 if __name__ == "__main__":
     solution = water_jug_problem(
@@ -91,4 +351,23 @@ if __name__ == "__main__":
         for step in solution:
             print(step, end=' ')
     else:
-        print("No solution exists.")
\ No newline at end of file
+        print("No solution exists.")
+
+    # Three jugs with capacities 3, 5 and 8, measuring 4 liters
+    print("\nThree jugs (3, 5, 8), target 4:", end=' ')
+    for step in water_jug_problem_n((3, 5, 8), 4):
+        print(step, end=' ')
+
+    # Many targets for the same jugs, answered from one precomputed table
+    print("\nJugs (4, 3), targets 1 and 2:", water_jug_batch(4, 3, [1, 2]))
+
+    # Informed search on the engine, with expansions against plain BFS order
+    informed = water_jug_search(4, 3, 2)
+    uninformed = water_jug_search(4, 3, 2, informed=False)
+    print("\nA* (4, 3), target 2:", informed.path,
+          "expanded:", informed.expanded, "vs BFS order:", uninformed.expanded)
+
+    # Instrumented run: expansions, peak queue length, time per BFS level
+    stats = SearchStats()
+    water_jug_problem(4, 3, 2, stats=stats)
+    print("\nStats for (4, 3), target 2:", stats)
@@ -0,0 +1,335 @@
+###################### SEARCH BENCHMARK SUITE ######################
+# Seeded synthetic graphs (random, grid, tree, power-law) from 10^3 to
+# 10^7 edges, traversed with bfs / dfs / bfs_levels, plus a sweep of water
+# jug capacity pairs. Graphs are generated once in the parent and saved
+# as binary CSR files; every case runs in a fresh process that maps its
+# graph, so its peak RSS is the search's own, not the generator's, and
+# records:
+    # wall time (best of --repeat runs), peak RSS, and the RSS before
+    # the search started (interpreter, modules and mapped graph header),
+    # nodes expanded, max frontier size (from SearchStats where the
+    # search does not count them itself)
+# Results go to a JSON file; --compare checks them against an earlier
+# run (e.g. from the previous commit) and flags slowdowns.
+#
+# Usage:
+#   python benchmark.py --output after.json --compare before.json
+#   python benchmark.py --max-edges 100000 --graphs grid tree
+
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+from csr_graph import CSRGraph, load_csr_file, write_csr_file
+from search_stats import SearchStats
+
+SEED = 346
+EDGE_COUNTS = [10**3, 10**4, 10**5, 10**6, 10**7]
+AVERAGE_DEGREE = 8
+POWER_LAW_EXPONENT = 2.5
+
+# Cases faster than this are too noisy to flag as regressions
+MIN_COMPARABLE_S = 0.05
+
+# (capacity_a, capacity_b, target), all solvable
+WATER_JUG_CASES = [
+    (3, 5, 4),
+    (97, 101, 50),
+    (997, 1009, 500),
+    (9973, 10007, 4000),
+    (29989, 30011, 12345),
+]
+
+
+def load_script(filename):
+    # The chapter scripts have names like 01-bfs.py, which cannot be imported
+    name = os.path.splitext(filename)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ------------------------- GRAPH GENERATORS -------------------------
+# Each takes the requested edge count and a seed, returns a CSRGraph.
+# Node 0 is the traversal start. Parallel edges are dropped, so the
+# actual edge count can be slightly lower than requested.
+
+def random_graph(num_edges, seed):
+    # Uniform random directed edges, average out-degree AVERAGE_DEGREE
+    rng = np.random.default_rng(seed)
+    n = max(num_edges // AVERAGE_DEGREE, 2)
+    return CSRGraph.from_edges(rng.integers(0, n, num_edges),
+                               rng.integers(0, n, num_edges), num_nodes=n)
+
+
+def grid_graph(num_edges, seed):
+    # Square grid, every cell linked both ways to its 4 neighbours
+    side = max(int(np.sqrt(num_edges / 4)), 2)
+    ids = np.arange(side * side).reshape(side, side)
+    left, right = ids[:, :-1].ravel(), ids[:, 1:].ravel()
+    up, down = ids[:-1, :].ravel(), ids[1:, :].ravel()
+    sources = np.concatenate([left, right, up, down])
+    targets = np.concatenate([right, left, down, up])
+    return CSRGraph.from_edges(sources, targets, num_nodes=side * side)
+
+
+def tree_graph(num_edges, seed):
+    # Random recursive tree: node i hangs below a uniform earlier node
+    rng = np.random.default_rng(seed)
+    children = np.arange(1, num_edges + 1)
+    parents = (rng.random(num_edges) * children).astype(np.int64)
+    return CSRGraph.from_edges(parents, children, num_nodes=num_edges + 1)
+
+
+def power_law_graph(num_edges, seed):
+    # Chung-Lu style: endpoint i drawn with weight i^(-1 / (exponent - 1)),
+    # giving a power-law degree distribution with node 0 as the largest hub
+    rng = np.random.default_rng(seed)
+    n = max(num_edges // AVERAGE_DEGREE, 2)
+    weights = np.arange(1, n + 1) ** (-1.0 / (POWER_LAW_EXPONENT - 1))
+    weights /= weights.sum()
+    return CSRGraph.from_edges(rng.choice(n, num_edges, p=weights),
+                               rng.choice(n, num_edges, p=weights), num_nodes=n)
+
+
+GENERATORS = {
+    "random": random_graph,
+    "grid": grid_graph,
+    "tree": tree_graph,
+    "power_law": power_law_graph,
+}
+
+
+# ---------------------------- ALGORITHMS ----------------------------
+# Each entry maps a name to (script, function). The script is loaded
+# before timing starts; function(module, ..., stats) runs one search.
+# Timed runs pass stats=None (the plain loops); one extra untimed run
+# with a SearchStats object supplies the counters. Functions that count
+# without stats return (nodes_expanded, max_frontier) themselves.
+
+def run_bfs(bfs, graph, stats):
+    for _ in bfs.bfs_iter(graph, 0, stats=stats):
+        pass
+
+
+def run_dfs(dfs, graph, stats):
+    for _ in dfs.dfs_iter(graph, 0, stats=stats):
+        pass
+
+
+def run_bfs_levels(bfs, graph, stats):
+    dist, _ = bfs.bfs_levels(graph, 0)
+    reached = dist[dist >= 0]
+    return int(reached.size), int(np.bincount(reached).max())
+
+
+GRAPH_ALGORITHMS = {
+    "bfs": ("01-bfs.py", run_bfs),
+    "dfs": ("02-dfs.py", run_dfs),
+    "bfs_levels": ("01-bfs.py", run_bfs_levels),
+}
+
+
+def run_water_jug_problem(jug, capacity_a, capacity_b, target, stats):
+    jug.water_jug_problem(capacity_a, capacity_b, target, stats=stats)
+
+
+def run_water_jug_astar(jug, capacity_a, capacity_b, target, stats):
+    return jug.water_jug_search(capacity_a, capacity_b, target).expanded, None
+
+
+WATER_JUG_ALGORITHMS = {
+    "water_jug_problem": ("03-water-jug-problem.py", run_water_jug_problem),
+    "water_jug_astar": ("03-water-jug-problem.py", run_water_jug_astar),
+}
+
+
+# ---------------------------- RUNNING ------------------------------
+
+def peak_rss_kb():
+    # VmHWM belongs to this process's own address space. ru_maxrss is
+    # carried over from the parent through fork and exec, so it would
+    # report the parent's peak (graph generation) for every small case.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(case):
+    # Runs in its own process (see main), so peak RSS covers this case only
+    if case["graph"] == "water_jug":
+        script, algorithm = WATER_JUG_ALGORITHMS[case["algorithm"]]
+        args = tuple(case["capacities"])
+    else:
+        script, algorithm = GRAPH_ALGORITHMS[case["algorithm"]]
+        args = (load_csr_file(case.pop("graph_path")),)
+    module = load_script(script)
+    baseline = peak_rss_kb()
+
+    times = []
+    for _ in range(case["repeat"]):
+        start = time.perf_counter()
+        counts = algorithm(module, *args, None)
+        times.append(time.perf_counter() - start)
+    peak = peak_rss_kb()
+
+    # Counters come from an untimed, instrumented run
+    if counts is None:
+        stats = SearchStats()
+        algorithm(module, *args, stats)
+        counts = stats.expanded, stats.peak_frontier
+    expanded, frontier = counts
+
+    case.update(wall_time_s=min(times), peak_rss_kb=peak, baseline_rss_kb=baseline,
+                nodes_expanded=expanded, max_frontier=frontier)
+    return case
+
+
+def build_cases(args):
+    cases = []
+    for kind in args.graphs:
+        for edges in args.edges:
+            if edges > args.max_edges:
+                continue
+            for algorithm in args.algorithms:
+                cases.append({"graph": kind, "edges": edges, "algorithm": algorithm,
+                              "seed": args.seed, "repeat": args.repeat})
+    if args.water_jug:
+        for capacities in WATER_JUG_CASES:
+            for algorithm in WATER_JUG_ALGORITHMS:
+                cases.append({"graph": "water_jug", "capacities": capacities,
+                              "algorithm": algorithm, "seed": args.seed,
+                              "repeat": args.repeat})
+    return cases
+
+
+def write_graphs(cases, directory):
+    # Generate every graph once, here in the parent, as a binary CSR file
+    # the case processes map; generator temporaries never reach their RSS
+    paths = {}
+    for case in cases:
+        if case["graph"] == "water_jug":
+            continue
+        key = (case["graph"], case["edges"], case["seed"])
+        if key not in paths:
+            graph = GENERATORS[case["graph"]](case["edges"], case["seed"])
+            paths[key] = (os.path.join(directory, "%s-%d-%d.csr" % key),
+                          graph.num_nodes, graph.num_edges)
+            write_csr_file(graph, paths[key][0])
+            del graph
+        case["graph_path"], case["nodes"], case["actual_edges"] = paths[key]
+
+
+def case_key(case):
+    return (case["graph"], case.get("edges"), tuple(case.get("capacities", ())), case["algorithm"])
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=HERE,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+    # Print time ratios against an earlier run; returns the regressions
+    with open(baseline_path) as f:
+        baseline = {case_key(case): case for case in json.load(f)["results"]}
+
+    regressions = []
+    for case in results:
+        before = baseline.get(case_key(case))
+        if before is None or not before["wall_time_s"]:
+            continue
+        ratio = case["wall_time_s"] / before["wall_time_s"]
+        slow_enough = max(case["wall_time_s"], before["wall_time_s"]) >= MIN_COMPARABLE_S
+        flag = "REGRESSION" if slow_enough and ratio > 1 + tolerance else ""
+        if flag:
+            regressions.append(case)
+        print("%-10s %-9s %-18s %8.3fs -> %8.3fs  x%.2f %s" % (
+            case["graph"], case.get("edges", case.get("capacities")), case["algorithm"],
+            before["wall_time_s"], case["wall_time_s"], ratio, flag))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark bfs, dfs and water_jug_problem")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--graphs", nargs="+", default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument("--algorithms", nargs="+", default=list(GRAPH_ALGORITHMS),
+                        choices=list(GRAPH_ALGORITHMS))
+    parser.add_argument("--edges", nargs="+", type=int, default=EDGE_COUNTS)
+    parser.add_argument("--max-edges", type=int, default=max(EDGE_COUNTS))
+    parser.add_argument("--no-water-jug", dest="water_jug", action="store_false")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--compare", metavar="BASELINE_JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown before a case is flagged (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    # A fresh process per case keeps peak RSS measurements independent
+    results = []
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        cases = build_cases(args)
+        write_graphs(cases, directory)
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            for case in pool.imap(run_case, cases, chunksize=1):
+                print("%-10s %-9s %-18s %8.3fs  %s KB (%s KB before the search)" % (
+                    case["graph"], case.get("edges", case.get("capacities")), case["algorithm"],
+                    case["wall_time_s"], case["peak_rss_kb"], case["baseline_rss_kb"]))
+                results.append(case)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Results written to", args.output)
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
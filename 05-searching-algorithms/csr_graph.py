@@ -0,0 +1,398 @@
+###################### COMPACT CSR GRAPH ######################
+# Adjacency stored in CSR (Compressed Sparse Row) form:
+    # Nodes are renumbered to dense integer ids 0 .. n-1
+    # offsets[i] : offsets[i + 1] is the slice of `targets`
+    # holding the neighbours of node id i
+    # labels[i] is the original label of node id i
+# A graph with millions of edges then costs two integer arrays
+# instead of a dict of Python lists.
+
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import tempfile
+from array import array
+
+import numpy as np
+
+
+def _index_dtype(n):
+    # Smallest integer type able to hold every node id
+    return np.int32 if n < 2**31 else np.int64
+
+
+class CSRGraph:
+    """Directed graph stored as CSR offset and target arrays"""
+
+    def __init__(self, offsets, targets, labels=None):
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        num_nodes = len(self.offsets) - 1
+        self.targets = np.ascontiguousarray(targets, dtype=_index_dtype(num_nodes))
+
+        # Label table: id -> label (list) and label -> id (dict)
+        # Without labels, the integer ids are the labels
+        self.labels = None if labels is None else list(labels)
+        self._ids = None
+        if self.labels is not None:
+            if len(self.labels) != num_nodes:
+                raise ValueError("Expected %d labels, got %d" % (num_nodes, len(self.labels)))
+            self._ids = {label: i for i, label in enumerate(self.labels)}
+
+        # Set when the arrays are mapped from a binary CSR file
+        self.source_path = None
+
+        # Transposed graph, built on the first reversed() call
+        self._reversed = None
+
+    @classmethod
+    def from_dict(cls, graph):
+        """Build from a {'A': ['B', 'C'], ...} adjacency dict"""
+        # Keys keep their order, nodes only seen as neighbours come last
+        labels = list(graph)
+        ids = {label: i for i, label in enumerate(labels)}
+        for neighbors in graph.values():
+            for neighbor in neighbors:
+                if neighbor not in ids:
+                    ids[neighbor] = len(labels)
+                    labels.append(neighbor)
+
+        offsets = np.zeros(len(labels) + 1, dtype=np.int64)
+        targets = []
+        for label in graph:
+            # Parallel edges are dropped, neighbour order is kept
+            row = [ids[neighbor] for neighbor in dict.fromkeys(graph[label])]
+            offsets[ids[label] + 1] = len(row)
+            targets.extend(row)
+        np.cumsum(offsets, out=offsets)
+
+        return cls(offsets, targets, labels)
+
+    @classmethod
+    def from_edges(cls, sources, targets, num_nodes=None, labels=None):
+        """Build from parallel arrays of integer edge endpoints"""
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if sources.shape != targets.shape:
+            raise ValueError("sources and targets must have the same length")
+        if num_nodes is None:
+            if labels is not None:
+                num_nodes = len(labels)
+            elif sources.size:
+                num_nodes = int(max(sources.max(), targets.max())) + 1
+            else:
+                num_nodes = 0
+
+        # Drop parallel edges, keeping the first occurrence of each
+        if sources.size:
+            keys = sources * num_nodes + targets
+            _, first = np.unique(keys, return_index=True)
+            first.sort()
+            sources, targets = sources[first], targets[first]
+
+        # Stable sort by source keeps each node's neighbour order
+        order = np.argsort(sources, kind="stable")
+        offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=num_nodes), out=offsets[1:])
+
+        return cls(offsets, targets[order], labels)
+
+    @property
+    def num_nodes(self):
+        return len(self.offsets) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.targets)
+
+    def id_of(self, label):
+        if self._ids is None:
+            return int(label)
+        return self._ids[label]
+
+    def label_of(self, node_id):
+        if self.labels is None:
+            return node_id
+        return self.labels[node_id]
+
+    def neighbors(self, node_id):
+        """Neighbour ids of `node_id` as an array view (no copy)"""
+        return self.targets[self.offsets[node_id]:self.offsets[node_id + 1]]
+
+    def new_visited(self):
+        """Visited map with one byte per node, all unvisited"""
+        return np.zeros(self.num_nodes, dtype=np.bool_)
+
+    def reversed(self):
+        """Transposed graph (every edge flipped), sharing the label table.
+
+        Built once and cached, so do not modify the arrays afterwards.
+        """
+        if self._reversed is None:
+            # Edges are already unique, so this skips from_edges' dedupe
+            # sort: a stable sort by target groups the predecessors
+            sources = np.repeat(np.arange(self.num_nodes, dtype=self.targets.dtype),
+                                np.diff(self.offsets))
+            order = np.argsort(self.targets, kind="stable")
+            offsets = np.zeros(self.num_nodes + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.targets, minlength=self.num_nodes), out=offsets[1:])
+            self._reversed = CSRGraph(offsets, sources[order], self.labels)
+            self._reversed._reversed = self
+        return self._reversed
+
+    # Dict-style access so code written for {'A': [...]} keeps working
+    def __getitem__(self, label):
+        return [self.label_of(i) for i in self.neighbors(self.id_of(label)).tolist()]
+
+    def __contains__(self, label):
+        if self._ids is None:
+            return isinstance(label, (int, np.integer)) and 0 <= label < self.num_nodes
+        return label in self._ids
+
+    def __iter__(self):
+        if self.labels is None:
+            return iter(range(self.num_nodes))
+        return iter(self.labels)
+
+    def __len__(self):
+        return self.num_nodes
+
+    def __repr__(self):
+        return "CSRGraph(num_nodes=%d, num_edges=%d)" % (self.num_nodes, self.num_edges)
+
+
+###################### BINARY CSR FILE FORMAT ######################
+# Little-endian layout, every section 8-byte aligned:
+    # header  : magic, version, flags, num_nodes, num_edges,
+    #           target item size, label table offset and length
+    # offsets : int64[num_nodes + 1]
+    # targets : int32 or int64[num_edges]
+    # labels  : optional UTF-8 JSON list, labels[i] for node id i
+    #           (JSON arrays are read back as tuples)
+# load_csr_file maps the file and views the arrays in place: opening a
+# multi-GB graph needs no parsing or copying, and concurrent processes
+# share the same pages through the page cache.
+
+CSR_MAGIC = b"CSRGRAPH"
+CSR_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQQQQ")
+_HAS_LABELS = 1
+
+
+def _align(position, alignment=8):
+    return -(-position // alignment) * alignment
+
+
+def write_csr_file(graph, path):
+    """Write a CSRGraph to the binary CSR format (labels must be JSON-able)"""
+    offsets = graph.offsets.astype("<i8", copy=False)
+    targets = graph.targets.astype(graph.targets.dtype.newbyteorder("<"), copy=False)
+    labels = b"" if graph.labels is None else json.dumps(graph.labels).encode("utf-8")
+
+    targets_start = _HEADER.size + offsets.nbytes
+    labels_start = _align(targets_start + targets.nbytes)
+    header = _HEADER.pack(CSR_MAGIC, CSR_VERSION, _HAS_LABELS if labels else 0,
+                          graph.num_nodes, graph.num_edges, targets.itemsize,
+                          labels_start, len(labels))
+
+    with open(path, "wb") as f:
+        f.write(header)
+        offsets.tofile(f)
+        targets.tofile(f)
+        f.write(b"\0" * (labels_start - targets_start - targets.nbytes))
+        f.write(labels)
+
+
+def _from_json(label):
+    # JSON writes tuple labels (e.g. water jug states) as lists; labels
+    # must be hashable, so lists come back as tuples
+    if isinstance(label, list):
+        return tuple(_from_json(item) for item in label)
+    return label
+
+
+def load_csr_file(path, labels=True):
+    """Memory-map a binary CSR file as a read-only CSRGraph (zero copy)"""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, flags, num_nodes, num_edges, itemsize, labels_start, labels_length = \
+        _HEADER.unpack_from(buffer, 0)
+    if magic != CSR_MAGIC:
+        raise ValueError("%s is not a binary CSR graph file" % path)
+    if version != CSR_VERSION:
+        raise ValueError("Unsupported CSR file version %d in %s" % (version, path))
+
+    offsets = np.frombuffer(buffer, dtype="<i8", count=num_nodes + 1, offset=_HEADER.size)
+    targets = np.frombuffer(buffer, dtype="<i%d" % itemsize, count=num_edges,
+                            offset=_HEADER.size + offsets.nbytes)
+
+    # The label table is the only part that has to be parsed
+    table = None
+    if labels and flags & _HAS_LABELS:
+        table = json.loads(buffer[labels_start:labels_start + labels_length].decode("utf-8"))
+        table = [_from_json(label) for label in table]
+
+    graph = CSRGraph(offsets, targets, table)
+    graph.source_path = os.path.abspath(path)
+    return graph
+
+
+def convert_edge_list(edge_path, out_path, numeric=None, comment="#"):
+    """Convert a text edge list to a binary CSR file, returns out_path.
+
+    Each line holds "source target" (extra columns such as weights are
+    ignored, lines starting with `comment` are skipped). With numeric=True
+    the tokens are integer node ids and no label table is written; with
+    numeric=False they are labels, numbered by first appearance.
+    numeric=None picks numeric when every token is a non-negative
+    integer (so negative numbers are read as labels).
+    """
+    sources, targets = array("q"), array("q")
+    ids, labels = {}, []
+    all_integers = True
+
+    with open(edge_path) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 2 or fields[0].startswith(comment):
+                continue
+            for token, column in ((fields[0], sources), (fields[1], targets)):
+                node = ids.get(token)
+                if node is None:
+                    node = ids[token] = len(labels)
+                    labels.append(token)
+                    all_integers = all_integers and token.isdigit()
+                column.append(node)
+
+    sources = np.frombuffer(sources, dtype=np.int64)
+    targets = np.frombuffer(targets, dtype=np.int64)
+    if numeric is None:
+        numeric = all_integers
+
+    if numeric:
+        # Tokens are the node ids themselves, which must be non-negative
+        for label in labels:
+            if not label.isdigit():
+                raise ValueError("Node id %r in %s is not a non-negative integer"
+                                 % (label, edge_path))
+        node_ids = np.array([int(label) for label in labels], dtype=np.int64)
+        graph = CSRGraph.from_edges(node_ids[sources], node_ids[targets])
+    else:
+        graph = CSRGraph.from_edges(sources, targets, labels=labels)
+
+    write_csr_file(graph, out_path)
+    return out_path
+
+
+def bfs_levels(graph, start):
+    """Level-synchronous BFS over a CSRGraph.
+
+    Each level's frontier is expanded with whole-array NumPy operations
+    instead of one node at a time. Returns dense `dist` and `parent`
+    arrays indexed by node id, with -1 for unreachable nodes (and for
+    the parent of the start node).
+    """
+    offsets, targets = graph.offsets, graph.targets
+    dist = np.full(graph.num_nodes, -1, dtype=np.int32)
+    parent = np.full(graph.num_nodes, -1, dtype=targets.dtype)
+
+    source = graph.id_of(start)
+    dist[source] = 0
+    frontier = np.array([source], dtype=targets.dtype)
+    level = 0
+
+    while frontier.size:
+        level += 1
+
+        # Gather every out-edge of the frontier into one flat array:
+        # edge j of frontier node i sits at targets[starts[i] + j]
+        starts = offsets[frontier]
+        counts = offsets[frontier + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            break
+        owners = np.repeat(frontier, counts)
+        positions = np.arange(total) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        neighbors = targets[positions]
+
+        # Keep unvisited targets; when several frontier nodes reach the
+        # same target, the first one in frontier order becomes its parent
+        unseen = dist[neighbors] < 0
+        neighbors, owners = neighbors[unseen], owners[unseen]
+        frontier, first = np.unique(neighbors, return_index=True)
+
+        dist[frontier] = level
+        parent[frontier] = owners[first]
+
+    return dist, parent
+
+
+def multi_source_bfs(graph, sources, workers=None, bitset=False, batch_size=64):
+    """Run bfs_levels from every source, fanned out over a process pool.
+
+    Workers map the graph read-only, so it is shared through the page
+    cache instead of being pickled per task: a graph loaded with
+    load_csr_file is mapped straight from its file, otherwise the CSR
+    arrays are first written once to temporary .npy files. Workers write their rows straight
+    into a memory-mapped result:
+        bitset=False : (len(sources), num_nodes) int32 distance matrix
+        bitset=True  : packed reachability bits, num_nodes / 8 bytes per row
+    """
+    source_ids = np.array([graph.id_of(source) for source in sources], dtype=np.int64)
+    if bitset:
+        shape, dtype = (len(source_ids), (graph.num_nodes + 7) // 8), np.uint8
+    else:
+        shape, dtype = (len(source_ids), graph.num_nodes), np.int32
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(source_ids) <= 1:
+        result = np.empty(shape, dtype=dtype)
+        _fill_rows(CSRGraph(graph.offsets, graph.targets), result, 0, source_ids, bitset)
+        return result
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if graph.source_path is None:
+            np.save(os.path.join(tmp, "offsets.npy"), graph.offsets)
+            np.save(os.path.join(tmp, "targets.npy"), graph.targets)
+        result_path = os.path.join(tmp, "result.npy")
+        np.lib.format.open_memmap(result_path, mode="w+", dtype=dtype, shape=shape).flush()
+
+        batches = [(first, source_ids[first:first + batch_size])
+                   for first in range(0, len(source_ids), batch_size)]
+        with multiprocessing.Pool(workers, initializer=_attach_worker,
+                                  initargs=(tmp, bitset, graph.source_path)) as pool:
+            for _ in pool.imap_unordered(_bfs_batch, batches):
+                pass
+
+        return np.array(np.load(result_path, mmap_mode="r"))
+
+
+# Per-worker state, set once by the pool initializer
+_worker = {}
+
+
+def _attach_worker(directory, bitset, graph_path):
+    if graph_path is not None:
+        _worker["graph"] = load_csr_file(graph_path, labels=False)
+    else:
+        offsets = np.load(os.path.join(directory, "offsets.npy"), mmap_mode="r")
+        targets = np.load(os.path.join(directory, "targets.npy"), mmap_mode="r")
+        _worker["graph"] = CSRGraph(offsets, targets)
+    _worker["result"] = np.load(os.path.join(directory, "result.npy"), mmap_mode="r+")
+    _worker["bitset"] = bitset
+
+
+def _bfs_batch(batch):
+    first, source_ids = batch
+    _fill_rows(_worker["graph"], _worker["result"], first, source_ids, _worker["bitset"])
+    _worker["result"].flush()
+
+
+def _fill_rows(graph, result, first, source_ids, bitset):
+    # `graph` is unlabelled here, so integer ids go straight to bfs_levels
+    for row, source in enumerate(source_ids.tolist(), start=first):
+        dist, _ = bfs_levels(graph, source)
+        result[row] = np.packbits(dist >= 0) if bitset else dist
@@ -0,0 +1,154 @@
+###################### INFORMED SEARCH ENGINE ######################
+# Generic best-first and iterative-deepening searches over any state space.
+# A problem is described by three plain callables:
+    # successors(state) -> iterable of (next_state, step_cost)
+    # is_goal(state)    -> True when state is a goal
+    # heuristic(state)  -> estimated remaining cost (0 at goals)
+# States must be hashable; packed integers give the most compact closed sets.
+# Every search reports how many states it expanded.
+
+from collections import namedtuple
+from heapq import heappop, heappush
+from itertools import count
+from math import inf
+
+# path     : list of states from start to goal (None if no solution)
+# cost     : total path cost (None if no solution)
+# expanded : number of states whose successors were generated
+SearchResult = namedtuple("SearchResult", ["path", "cost", "expanded"])
+
+# Largest state space for which a bitmap closed set is allocated
+# (2**30 states = 128 MB), above it a Python set is used
+BITSET_LIMIT = 2 ** 30
+
+
+class BitSet:
+    """Closed set over integer states 0 .. size-1, one bit per state"""
+
+    def __init__(self, size):
+        self.bits = bytearray((size + 7) >> 3)
+
+    def add(self, state):
+        self.bits[state >> 3] |= 1 << (state & 7)
+
+    def __contains__(self, state):
+        return self.bits[state >> 3] >> (state & 7) & 1 == 1
+
+
+def closed_set(num_states=None):
+    # Bitmap when integer states have a known, reasonable bound
+    if num_states is not None and num_states <= BITSET_LIMIT:
+        return BitSet(num_states)
+    return set()
+
+
+def astar(start, successors, is_goal, heuristic, num_states=None):
+    # A*: expand in order of f = g + h; optimal for admissible heuristics
+    return _best_first(start, successors, is_goal, heuristic, True, num_states)
+
+
+def greedy_best_first(start, successors, is_goal, heuristic, num_states=None):
+    # Greedy best-first: expand in order of h alone; fast, not optimal
+    return _best_first(start, successors, is_goal, heuristic, False, num_states)
+
+
+def _best_first(start, successors, is_goal, heuristic, use_cost, num_states):
+    # Cheapest known cost and parent of every generated state
+    cost = {start: 0}
+    parent = {start: None}
+    closed = closed_set(num_states)
+    expanded = 0
+
+    # Binary heap open list of (priority, h, tie, state). Decrease-key is
+    # done by pushing a new entry; the outdated one is skipped when popped
+    # (lazy deletion). `tie` keeps states from ever being compared.
+    tie = count()
+    h = heuristic(start)
+    open_list = [(h, h, next(tie), start)]
+
+    while open_list:
+        _, _, _, state = heappop(open_list)
+
+        # Stale entry for a state that was already expanded
+        if state in closed:
+            continue
+
+        if is_goal(state):
+            return SearchResult(_rebuild_path(parent, state), cost[state], expanded)
+
+        closed.add(state)
+        expanded += 1
+
+        g = cost[state]
+        for next_state, step_cost in successors(state):
+            if next_state in closed:
+                continue
+            new_cost = g + step_cost
+            if new_cost < cost.get(next_state, inf):
+                cost[next_state] = new_cost
+                parent[next_state] = state
+                h = heuristic(next_state)
+                priority = new_cost + h if use_cost else h
+                heappush(open_list, (priority, h, next(tie), next_state))
+
+    return SearchResult(None, None, expanded)
+
+
+def ida_star(start, successors, is_goal, heuristic):
+    # IDA*: depth-first searches bounded by f = g + h, raising the bound to
+    # the smallest f that exceeded it. Memory is linear in the path length;
+    # only states on the current path are kept (to avoid cycles).
+    if is_goal(start):
+        return SearchResult([start], 0, 0)
+
+    bound = heuristic(start)
+    expanded = 0
+
+    while bound < inf:
+        next_bound = inf
+
+        # Explicit stack of successor iterators, no recursion limit
+        path, path_cost, on_path = [start], [0], {start}
+        stack = [iter(successors(start))]
+        expanded += 1
+
+        while stack:
+            step = next(stack[-1], None)
+            if step is None:
+                # All successors tried, backtrack
+                stack.pop()
+                on_path.discard(path.pop())
+                path_cost.pop()
+                continue
+
+            state, step_cost = step
+            if state in on_path:
+                continue
+
+            g = path_cost[-1] + step_cost
+            f = g + heuristic(state)
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+
+            if is_goal(state):
+                return SearchResult(path + [state], g, expanded)
+
+            path.append(state)
+            path_cost.append(g)
+            on_path.add(state)
+            stack.append(iter(successors(state)))
+            expanded += 1
+
+        bound = next_bound
+
+    return SearchResult(None, None, expanded)
+
+
+def _rebuild_path(parent, state):
+    path = []
+    while state is not None:
+        path.append(state)
+        state = parent[state]
+    path.reverse()
+    return path
@@ -0,0 +1,41 @@
+###################### SEARCH INSTRUMENTATION ######################
+# Optional statistics for bfs_iter, dfs_iter and water_jug_problem.
+# Passing stats=SearchStats() to a search records:
+    # expanded      : nodes whose successors were generated
+    # duplicates    : successors skipped because they were already seen
+    #                 (plus stale stack entries popped by DFS)
+    # peak_frontier : largest queue (BFS) or stack (DFS) length
+    # level_times   : seconds spent on each BFS level (BFS only)
+    # elapsed       : seconds from the first node to the end of the search
+# and calls progress(stats) every `every` expansions, for sampling long
+# runs. Without stats the searches run their plain loops, so the hot
+# path pays nothing. The searches are lazy generators, so all times
+# include whatever the caller does between items.
+
+
+class SearchStats:
+    """Counters and timings filled in by an instrumented search"""
+
+    def __init__(self, progress=None, every=100000):
+        self.progress = progress
+        self.every = every
+        self.expanded = 0
+        self.duplicates = 0
+        self.peak_frontier = 0
+        self.level_times = []
+        self.elapsed = 0.0
+
+    def as_dict(self):
+        return {
+            "expanded": self.expanded,
+            "duplicates": self.duplicates,
+            "peak_frontier": self.peak_frontier,
+            "levels": len(self.level_times),
+            "level_times": list(self.level_times),
+            "elapsed": self.elapsed,
+        }
+
+    def __repr__(self):
+        return ("SearchStats(expanded=%d, duplicates=%d, peak_frontier=%d, levels=%d, elapsed=%.6f)"
+                % (self.expanded, self.duplicates, self.peak_frontier,
+                   len(self.level_times), self.elapsed))
@@ -0,0 +1,248 @@
+###################### TRAVERSAL CORE ######################
+# Lazy BFS / DFS shared by the searching scripts. A graph only has to
+# answer "what are the successors of this node?", in any of these forms:
+    # a mapping:          graph[node] -> iterable of nodes (dict, CSRGraph)
+    # a callable:         graph(node) -> iterable of nodes
+    # a protocol object:  graph.successors(node) -> iterable of nodes
+# Implicit graphs (generated state spaces) produce successors on demand
+# and are never materialized. CSRGraph gets an array-based fast path.
+
+import time
+from collections import deque
+
+import numpy as np
+
+from csr_graph import CSRGraph
+
+
+class ImplicitGraph:
+    """Graph defined only by a successor function, e.g. a state space"""
+
+    def __init__(self, successors):
+        self.successors = successors
+
+    # Mapping-style access for code written against graph[node]
+    def __getitem__(self, node):
+        return self.successors(node)
+
+
+def successor_function(graph):
+    # Normalize any supported graph form to a successors(node) callable
+    successors = getattr(graph, "successors", None)
+    if callable(successors):
+        return successors
+    if callable(graph):
+        return graph
+    return graph.__getitem__
+
+
+def bfs_iter(graph, start, with_info=False, stats=None):
+    # Lazily yield nodes in BFS order, or (node, depth, parent) tuples
+    # when with_info is set. Callers can stop early or collect with list().
+    # With a SearchStats object, an instrumented copy of the loop runs.
+    if stats is not None:
+        yield from _bfs_iter_traced(*_traced_access(graph, start), with_info, stats)
+        return
+
+    if isinstance(graph, CSRGraph):
+        yield from _bfs_iter_csr(graph, start, with_info)
+        return
+
+    successors = successor_function(graph)
+
+    # Marking on enqueue gives the same order as marking on dequeue,
+    # but keeps every node in the queue at most once
+    visited = {start}
+    queue = deque([(start, 0, None)])
+
+    while queue:
+        node, depth, parent = queue.popleft()
+        yield (node, depth, parent) if with_info else node
+
+        for neighbor in successors(node):
+            if neighbor not in visited:
+                visited.add(neighbor)
+                queue.append((neighbor, depth + 1, node))
+
+
+def _bfs_iter_csr(graph, start, with_info):
+    # Byte-per-node visited map over integer ids instead of a set of labels
+    visited = graph.new_visited()
+    source = graph.id_of(start)
+    visited[source] = True
+    queue = deque([source])
+
+    # Depth and parent are only tracked when asked for
+    if with_info:
+        depth = np.zeros(graph.num_nodes, dtype=np.int64)
+        parent = np.full(graph.num_nodes, -1, dtype=np.int64)
+
+    while queue:
+        node = queue.popleft()
+        if with_info:
+            up = int(parent[node])
+            yield (graph.label_of(node), int(depth[node]),
+                   None if up < 0 else graph.label_of(up))
+        else:
+            yield graph.label_of(node)
+
+        # Filter the whole neighbour slice at once
+        neighbors = graph.neighbors(node)
+        fresh = neighbors[~visited[neighbors]]
+        visited[fresh] = True
+        if with_info:
+            depth[fresh] = depth[node] + 1
+            parent[fresh] = node
+        queue.extend(fresh.tolist())
+
+
+def dfs_iter(graph, start, with_info=False, stats=None):
+    # Lazily yield nodes in DFS order, or (node, depth, parent) tuples
+    # when with_info is set. Callers can stop early or collect with list().
+    # With a SearchStats object, an instrumented copy of the loop runs.
+    if stats is not None:
+        yield from _dfs_iter_traced(*_traced_access(graph, start), with_info, stats)
+        return
+
+    if isinstance(graph, CSRGraph):
+        yield from _dfs_iter_csr(graph, start, with_info)
+        return
+
+    successors = successor_function(graph)
+    visited = set()
+    stack = [(start, 0, None)]
+
+    while stack:
+        node, depth, parent = stack.pop()
+        if node not in visited:
+            yield (node, depth, parent) if with_info else node
+            visited.add(node)
+            stack.extend(reversed([(neighbor, depth + 1, node) for neighbor in successors(node) if neighbor not in visited]))
+
+
+def _dfs_iter_csr(graph, start, with_info):
+    # Byte-per-node visited map over integer ids instead of a set of labels
+    visited = graph.new_visited()
+    source = graph.id_of(start)
+
+    # Plain ids on the stack, (id, depth, parent id) only when asked for
+    stack = [(source, 0, -1)] if with_info else [source]
+
+    while stack:
+        entry = stack.pop()
+        node = entry[0] if with_info else entry
+        if visited[node]:
+            continue
+        visited[node] = True
+
+        if with_info:
+            _, depth, parent = entry
+            yield (graph.label_of(node), depth,
+                   None if parent < 0 else graph.label_of(parent))
+        else:
+            yield graph.label_of(node)
+
+        # Filter the whole neighbour slice at once, reversed so the
+        # first neighbour is popped first
+        neighbors = graph.neighbors(node)
+        fresh = neighbors[~visited[neighbors]][::-1].tolist()
+        if with_info:
+            stack.extend((neighbor, depth + 1, node) for neighbor in fresh)
+        else:
+            stack.extend(fresh)
+
+
+###################### INSTRUMENTED TRAVERSALS ######################
+# Copies of the generic loops that also fill in a SearchStats object.
+# Kept separate so the plain loops above carry no instrumentation cost.
+
+def _traced_access(graph, start):
+    # (successors, start, label_of), CSR graphs traversed over integer ids
+    if isinstance(graph, CSRGraph):
+        return (lambda node: graph.neighbors(node).tolist(),
+                graph.id_of(start), graph.label_of)
+    return successor_function(graph), start, None
+
+
+def _item(node, depth, parent, with_info, label_of):
+    if label_of is not None:
+        node = label_of(node)
+        parent = None if parent is None else label_of(parent)
+    return (node, depth, parent) if with_info else node
+
+
+def _bfs_iter_traced(successors, start, label_of, with_info, stats):
+    clock = time.perf_counter
+    started = level_started = clock()
+    level = 0
+    progress, every = stats.progress, stats.every
+
+    visited = {start}
+    queue = deque([(start, 0, None)])
+    stats.peak_frontier = max(stats.peak_frontier, 1)
+
+    try:
+        while queue:
+            node, depth, parent = queue.popleft()
+
+            # First node of a new level closes the timing of the previous one
+            if depth != level:
+                now = clock()
+                stats.level_times.append(now - level_started)
+                level, level_started = depth, now
+
+            yield _item(node, depth, parent, with_info, label_of)
+
+            stats.expanded += 1
+            for neighbor in successors(node):
+                if neighbor in visited:
+                    stats.duplicates += 1
+                    continue
+                visited.add(neighbor)
+                queue.append((neighbor, depth + 1, node))
+
+            if len(queue) > stats.peak_frontier:
+                stats.peak_frontier = len(queue)
+            if progress is not None and stats.expanded % every == 0:
+                progress(stats)
+    finally:
+        now = clock()
+        stats.level_times.append(now - level_started)
+        stats.elapsed = now - started
+
+
+def _dfs_iter_traced(successors, start, label_of, with_info, stats):
+    clock = time.perf_counter
+    started = clock()
+    progress, every = stats.progress, stats.every
+
+    visited = set()
+    stack = [(start, 0, None)]
+    stats.peak_frontier = max(stats.peak_frontier, 1)
+
+    try:
+        while stack:
+            node, depth, parent = stack.pop()
+            if node in visited:
+                # Stale entry, pushed before the node was reached another way
+                stats.duplicates += 1
+                continue
+
+            yield _item(node, depth, parent, with_info, label_of)
+            visited.add(node)
+
+            stats.expanded += 1
+            fresh = []
+            for neighbor in successors(node):
+                if neighbor in visited:
+                    stats.duplicates += 1
+                else:
+                    fresh.append((neighbor, depth + 1, node))
+            stack.extend(reversed(fresh))
+
+            if len(stack) > stats.peak_frontier:
+                stats.peak_frontier = len(stack)
+            if progress is not None and stats.expanded % every == 0:
+                progress(stats)
+    finally:
+        stats.elapsed = clock() - started
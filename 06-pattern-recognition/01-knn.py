@@ -1,18 +1,56 @@
-import cv2 
-import numpy as np 
-import matplotlib.pyplot as plt 
+import numpy as np
 
-# Feature set containing (x,y) values of 25 known/training data 
-trainData = np.random.randint(0, 100, (25, 2)).astype(np.float32) 
+from knn import KNNClassifier
 
-# Labels each one either Red or Blue with numbers 0 and 1 
-responses = np.random.randint(0, 2, (25, 1)).astype(np.float32) 
 
-# Take Red families and plot them 
-red = trainData[responses.ravel() == 0] 
-plt.scatter(red[:, 0], red[:, 1], 80, c='r', marker='^') 
+def make_data(num_points=25, seed=None):
+    # seed may also be a Generator, shared with the caller's own draws
+    rng = np.random.default_rng(seed)
 
-# Take Blue families and plot them 
-blue = trainData[responses.ravel() == 1] 
-plt.scatter(blue[:, 0], blue[:, 1], 80, c='b', marker='s') 
-plt.show() 
\ No newline at end of file
+    # Feature set containing (x,y) values of known/training data
+    trainData = rng.integers(0, 100, (num_points, 2)).astype(np.float32)
+
+    # Labels each one either Red or Blue with numbers 0 and 1
+    responses = rng.integers(0, 2, (num_points, 1)).astype(np.float32)
+    return trainData, responses
+
+
+def classify(trainData, responses, newcomer, k=3):
+    # Index the training data in a KD-tree and vote among the k nearest
+    knn = KNNClassifier(k=k).fit(trainData, responses)
+    ret, results, neighbours, dist = knn.find_nearest(newcomer)
+    return knn, results, neighbours, dist
+
+
+def plot(trainData, responses, newcomer):
+    # Imported here so that classifying never pays for the GUI
+    import matplotlib.pyplot as plt
+
+    # Take Red families and plot them
+    red = trainData[responses.ravel() == 0]
+    plt.scatter(red[:, 0], red[:, 1], 80, c='r', marker='^')
+
+    # Take Blue families and plot them
+    blue = trainData[responses.ravel() == 1]
+    plt.scatter(blue[:, 0], blue[:, 1], 80, c='b', marker='s')
+
+    # The new point, shown in green
+    plt.scatter(newcomer[:, 0], newcomer[:, 1], 80, c='g', marker='o')
+    plt.show()
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng()
+    trainData, responses = make_data(seed=rng)
+
+    # A new point to classify
+    newcomer = rng.integers(0, 100, (1, 2)).astype(np.float32)
+    knn, results, neighbours, dist = classify(trainData, responses, newcomer)
+
+    print("result:    ", results)
+    print("neighbours:", neighbours)
+    print("distance:  ", dist)
+
+    # The newcomer joins the training data with its label, no rebuild needed
+    knn.add(newcomer, results)
+    plot(trainData, responses, newcomer)
@@ -1,25 +1,39 @@
-import numpy as np 
-import cv2 
-from matplotlib import pyplot as plt 
-
-X = np.random.randint(25,50,(25,2)) 
-Y = np.random.randint(60,85,(25,2)) 
-Z = np.vstack((X,Y)) 
-
-# convert to np.float32 
-Z = np.float32(Z) 
-
-# define criteria and apply kmeans() 
-criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0) 
-ret,label,center=cv2.kmeans(Z,2,None,criteria,10,cv2.KMEANS_RANDOM_CENTERS) 
-
-# Now separate the data, Note the flatten() 
-A = Z[label.ravel()==0] 
-B = Z[label.ravel()==1] 
-
-# Plot the data 
-plt.scatter(A[:,0],A[:,1]) 
-plt.scatter(B[:,0],B[:,1],c = 'r') 
-plt.scatter(center[:,0],center[:,1],s = 80,c = 'y', marker = 's') 
-plt.xlabel('Height'),plt.ylabel('Weight') 
-plt.show() 
\ No newline at end of file
+import numpy as np
+
+from kmeans import kmeans, KMEANS_PP_CENTERS, TERM_CRITERIA_EPS, TERM_CRITERIA_MAX_ITER
+
+
+def make_data(seed=None):
+    rng = np.random.default_rng(seed)
+    X = rng.integers(25, 50, (25, 2))
+    Y = rng.integers(60, 85, (25, 2))
+    Z = np.vstack((X, Y))
+
+    # convert to np.float32
+    return np.float32(Z)
+
+
+def cluster(Z, K=2):
+    # define criteria and apply kmeans()
+    # k-means++ seeding needs fewer attempts than random centers
+    criteria = (TERM_CRITERIA_EPS + TERM_CRITERIA_MAX_ITER, 10, 1.0)
+    ret, label, center = kmeans(Z, K, None, criteria, 3, KMEANS_PP_CENTERS)
+    return ret, label, center
+
+
+def plot(Z, label, center):
+    from matplotlib import pyplot as plt
+
+    # Now separate the data, Note the flatten()
+    for cluster_id in range(len(center)):
+        members = Z[label.ravel() == cluster_id]
+        plt.scatter(members[:, 0], members[:, 1])
+    plt.scatter(center[:, 0], center[:, 1], s=80, c='y', marker='s')
+    plt.xlabel('Height'), plt.ylabel('Weight')
+    plt.show()
+
+
+if __name__ == "__main__":
+    Z = make_data()
+    ret, label, center = cluster(Z)
+    plot(Z, label, center)
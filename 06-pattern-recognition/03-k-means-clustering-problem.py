@@ -14,72 +14,71 @@ Given:
 
 # ------- IMPORT REQUIRED LIBRARIES --------
 import numpy as np
-import cv2
-from matplotlib import pyplot as plt
+
+from kmeans import kmeans_1d
+
 
 # ---------- DATA GENERATION ----------
-# Generate 25 random values between 25 and 100
-x = np.random.randint(25, 100, 25)
+def make_data(seed=None):
+    rng = np.random.default_rng(seed)
+
+    # Generate 25 random values between 25 and 100
+    x = rng.integers(25, 100, 25)
+
+    # Generate 25 random values between 175 and 255
+    y = rng.integers(175, 255, 25)
 
-# Generate 25 random values between 175 and 255
-y = np.random.randint(175, 255, 25)
+    # Combine both arrays into a single array
+    z = np.hstack((x, y))
 
-# Combine both arrays into a single array
-z = np.hstack((x, y))
+    # Reshape data into a column vector (one feature per row)
+    z = z.reshape((-1, 1))
 
-# Reshape data into a column vector (required by OpenCV K-Means)
-z = z.reshape((50, 1))
+    # Convert data type to float32
+    return np.float32(z)
 
-# Convert data type to float32 (required by OpenCV)
-z = np.float32(z)
 
 # ----- HISTOGRAM OF ORIGINAL DATA ------
-plt.hist(z, 256, [0, 256])
-plt.title("Histogram of Original Data")
-plt.xlabel("Value")
-plt.ylabel("Frequency")
-plt.show()
+def plot_histogram(z):
+    from matplotlib import pyplot as plt
+
+    plt.hist(z, 256, [0, 256])
+    plt.title("Histogram of Original Data")
+    plt.xlabel("Value")
+    plt.ylabel("Frequency")
+    plt.show()
+
 
 # ------- APPLY K-MEANS CLUSTERING ------
-# Define stopping criteria:
-# Stop after 10 iterations or when accuracy reaches epsilon = 1.0
-criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER,
-            10, 1.0)
-
-# Number of clusters (since data has two distinct groups)
-K = 2
-
-# Apply K-Means clustering
-ret, label, center = cv2.kmeans(
-    z,                      # input data
-    K,                      # number of clusters
-    None,                   # initial labels
-    criteria,               # termination criteria
-    10,                     # number of attempts
-    cv2.KMEANS_RANDOM_CENTERS
-)
-
-# ------ DISPLAY CLUSTER CENTERS -------
-print("Cluster Centers:")
-print(center)
-
-# ------- SEPARATE DATA BASED ON CLUSTERS ------
-cluster1 = z[label.ravel() == 0]
-cluster2 = z[label.ravel() == 1]
+def cluster(z, K=2):
+    # The values are integers in 0-255, so k-means can work on their
+    # 256-bin histogram and find the globally best split directly:
+    # no stopping criteria and no random restarts needed
+    ret, label, center = kmeans_1d(
+        z,                      # input data
+        K                       # number of clusters
+    )
+    return ret, label, center
+
 
 # ------- PLOT CLUSTERED DATA --------
-plt.hist(cluster1, 256, [0, 256], alpha=0.6, label="Cluster 1")
-plt.hist(cluster2, 256, [0, 256], alpha=0.6, label="Cluster 2")
+def plot_clusters(z, label, center):
+    from matplotlib import pyplot as plt
 
-# Plot cluster centers as vertical lines
-plt.axvline(center[0], color='black', linestyle='--', label='Center 1')
-plt.axvline(center[1], color='red', linestyle='--', label='Center 2')
+    # Separate data based on clusters
+    for i in range(len(center)):
+        plt.hist(z[label.ravel() == i], 256, [0, 256], alpha=0.6, label="Cluster %d" % (i + 1))
+
+    # Plot cluster centers as vertical lines
+    for i, color in zip(range(len(center)), ['black', 'red', 'green', 'blue', 'purple']):
+        plt.axvline(center[i], color=color, linestyle='--', label='Center %d' % (i + 1))
+
+    plt.title("K-Means Clustering Result (K = %d)" % len(center))
+    plt.xlabel("Value")
+    plt.ylabel("Frequency")
+    plt.legend()
+    plt.show()
 
-plt.title("K-Means Clustering Result (K = 2)")
-plt.xlabel("Value")
-plt.ylabel("Frequency")
-plt.legend()
-plt.show()
 
 # ------ RESULT ANALYSIS -------
 """
@@ -92,4 +91,18 @@ Analysis:
 - Since the data is well separated, K-Means converges quickly and accurately.
 """
 
-print("K-Means clustering successfully divided the data into two distinct clusters.")
+
+if __name__ == "__main__":
+    z = make_data()
+    plot_histogram(z)
+
+    # Number of clusters (since data has two distinct groups)
+    K = 2
+    ret, label, center = cluster(z, K)
+
+    # ------ DISPLAY CLUSTER CENTERS -------
+    print("Cluster Centers:")
+    print(center)
+    plot_clusters(z, label, center)
+
+    print("K-Means clustering successfully divided the data into two distinct clusters.")
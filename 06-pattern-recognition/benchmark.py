@@ -0,0 +1,221 @@
+###################### PATTERN RECOGNITION BENCHMARK ######################
+# Seeded synthetic data sets (gaussian blobs and uniform noise) for two
+# suites:
+# knn    : the approximate IVFIndex at several n_probe settings, recording
+    # build time, query time per query,
+    # recall@k: fraction of the exact k nearest neighbours that were found
+#          Exact neighbours come from the blocked BruteForceIndex scan,
+#          which is also timed as the baseline to beat.
+# kmeans : lloyd, hamerly and elkan from the same k-means++ centers for
+#          several K, recording time, iterations, distance evaluations
+#          and the fraction of Lloyd's evaluations that were skipped.
+# startup: cold-start time of loading every chapter script and module in
+#          a fresh interpreter (best of --startup-repeat), and which of
+#          cv2 / matplotlib that pulled in (none should be).
+#
+# Usage:
+#   python benchmark.py
+#   python benchmark.py --suites knn --points 1000000 --dims 64 --probes 1 4 16 --k 10
+#   python benchmark.py --suites kmeans --clusters 16 256 1024
+#   python benchmark.py --suites startup
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+if HERE not in sys.path:
+    sys.path.insert(0, HERE)
+
+from kmeans import ALGORITHMS as KMEANS_ALGORITHMS
+from kmeans import KMeansStats, kmeans_plus_plus
+from knn import BruteForceIndex, IVFIndex
+
+SEED = 346
+NUM_POINTS = 200000
+NUM_QUERIES = 1000
+DIMENSIONS = 32
+NUM_BLOBS = 100
+PROBES = [1, 2, 4, 8, 16, 32, 64]
+CLUSTERS = [16, 64, 256]
+KMEANS_POINTS = 50000
+KMEANS_MAX_ITER = 100
+
+STARTUP_TARGETS = ["01-knn.py", "02-k-means-clustering.py", "03-k-means-clustering-problem.py",
+                   "knn.py", "kmeans.py", "cli.py"]
+HEAVY_MODULES = ["cv2", "matplotlib"]
+
+# Loads one file as a module (the script names are not importable) and
+# prints the heavy modules it imported
+STARTUP_PROBE = """
+import importlib.util, sys
+sys.path.insert(0, %r)
+spec = importlib.util.spec_from_file_location("probe", %r)
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(",".join(name for name in %r if name in sys.modules))
+"""
+
+
+# ---------------------------- DATA SETS -----------------------------
+# Each takes (num_points, dims, rng) and returns a float32 array.
+
+def blobs(num_points, dims, rng):
+    # Gaussian clusters around uniform random centres, like real features
+    centres = rng.uniform(-10, 10, (NUM_BLOBS, dims))
+    labels = rng.integers(0, NUM_BLOBS, num_points)
+    return (centres[labels] + rng.standard_normal((num_points, dims))).astype(np.float32)
+
+
+def uniform(num_points, dims, rng):
+    # No structure at all: the worst case for any coarse quantizer
+    return rng.uniform(-10, 10, (num_points, dims)).astype(np.float32)
+
+
+DATASETS = {
+    "blobs": blobs,
+    "uniform": uniform,
+}
+
+
+# ---------------------------- RUNNING ------------------------------
+
+def recall_at_k(found, exact):
+    # Fraction of the exact neighbours present in each row of `found`
+    hits = (found[:, :, None] == exact[:, None, :]).any(axis=1)
+    return float(hits.mean())
+
+
+def run_knn(name, args):
+    rng = np.random.default_rng(args.seed)
+    data = DATASETS[name](args.points, args.dims, rng)
+    queries = DATASETS[name](args.queries, args.dims, rng)
+
+    start = time.perf_counter()
+    _, exact = BruteForceIndex(data, args.block_size).query(queries, args.k)
+    exact_s = (time.perf_counter() - start) / len(queries)
+    print("%-8s exact           %10.3f ms/query" % (name, exact_s * 1e3))
+
+    start = time.perf_counter()
+    index = IVFIndex(data, args.lists)
+    build_s = time.perf_counter() - start
+
+    results = []
+    for n_probe in args.probes:
+        if n_probe > index.n_lists:
+            continue
+        start = time.perf_counter()
+        _, found = index.query(queries, args.k, n_probe=n_probe)
+        query_s = (time.perf_counter() - start) / len(queries)
+        recall = recall_at_k(found, exact)
+        print("%-8s n_probe=%-6d  %10.3f ms/query  recall@%d %.3f  x%.1f" % (
+            name, n_probe, query_s * 1e3, args.k, recall, exact_s / query_s))
+        results.append({"suite": "knn", "dataset": name, "n_probe": n_probe, "n_lists": index.n_lists,
+                        "build_s": build_s, "query_s": query_s, "exact_query_s": exact_s,
+                        "k": args.k, "recall": recall})
+    return results
+
+
+def run_kmeans(name, args):
+    rng = np.random.default_rng(args.seed)
+    data = DATASETS[name](args.kmeans_points, args.dims, rng)
+
+    results = []
+    for k in args.clusters:
+        centers = kmeans_plus_plus(data, k, np.random.default_rng(args.seed))
+        for algorithm, run in KMEANS_ALGORITHMS.items():
+            stats = KMeansStats()
+            start = time.perf_counter()
+            compactness, _, _ = run(data, centers, KMEANS_MAX_ITER, 0.0, stats)
+            elapsed = time.perf_counter() - start
+            print("%-8s K=%-6d %-8s %8.3fs  %3d iterations  %12d distances  skipped %.3f" % (
+                name, k, algorithm, elapsed, stats.iterations, stats.distances, stats.skipped))
+            results.append(dict(stats.as_dict(), suite="kmeans", dataset=name, k=k,
+                                algorithm=algorithm, time_s=elapsed, compactness=compactness))
+    return results
+
+
+def run_startup(args):
+    def best_time(code):
+        times, output = [], ""
+        for _ in range(args.startup_repeat):
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", code], check=True,
+                                    capture_output=True, text=True).stdout
+            times.append(time.perf_counter() - start)
+        return min(times), output.strip()
+
+    interpreter, _ = best_time("pass")
+    print("%-34s %8.3fs" % ("(bare interpreter)", interpreter))
+    results = []
+    for target in STARTUP_TARGETS:
+        elapsed, heavy = best_time(STARTUP_PROBE % (HERE, os.path.join(HERE, target), HEAVY_MODULES))
+        print("%-34s %8.3fs  heavy imports: %s" % (target, elapsed, heavy or "none"))
+        results.append({"suite": "startup", "target": target, "time_s": elapsed,
+                        "interpreter_s": interpreter, "heavy_imports": heavy.split(",") if heavy else []})
+    return results
+
+
+# Run once per data set; the startup suite runs once
+SUITES = {
+    "knn": run_knn,
+    "kmeans": run_kmeans,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark approximate kNN, k-means and start-up")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--suites", nargs="+", default=list(SUITES) + ["startup"],
+                        choices=list(SUITES) + ["startup"])
+    parser.add_argument("--datasets", nargs="+", default=list(DATASETS), choices=list(DATASETS))
+    parser.add_argument("--points", type=int, default=NUM_POINTS)
+    parser.add_argument("--queries", type=int, default=NUM_QUERIES)
+    parser.add_argument("--dims", type=int, default=DIMENSIONS)
+    parser.add_argument("--lists", type=int, default=None,
+                        help="IVF cells (default sqrt(points))")
+    parser.add_argument("--probes", nargs="+", type=int, default=PROBES)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--block-size", type=int, default=1024,
+                        help="tile size of the exact brute-force scan")
+    parser.add_argument("--clusters", nargs="+", type=int, default=CLUSTERS,
+                        help="K values of the kmeans suite")
+    parser.add_argument("--kmeans-points", type=int, default=KMEANS_POINTS)
+    parser.add_argument("--startup-repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args(argv)
+
+    results = []
+    for suite in args.suites:
+        if suite == "startup":
+            results.extend(run_startup(args))
+            continue
+        for name in args.datasets:
+            results.extend(SUITES[suite](name, args))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "points": args.points,
+            "kmeans_points": args.kmeans_points,
+            "dims": args.dims,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Results written to", args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
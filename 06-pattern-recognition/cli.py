@@ -0,0 +1,225 @@
+###################### PATTERN RECOGNITION CLI ######################
+# Headless batch runs of the chapter's k-means and kNN, nothing rendered:
+#   python cli.py kmeans data.npy --k 3 --labels labels.npy --centers centers.npy
+#   python cli.py kmeans data.csv --k auto --k-range 2 10 --criterion gap
+#   python cli.py kmeans samples.u8 --dtype uint8 --dims 1 --one-d --k 4 --labels labels.bin
+#   python cli.py knn train.npy responses.npy queries.npy --k 5 --labels predicted.npy
+# Input files:
+    # .npy        : memory-mapped
+    # .csv / .txt : np.loadtxt (comma / whitespace separated)
+    # other       : raw binary, memory-mapped (needs --dtype and --dims)
+# Output files are written the same way by extension (.npy, .csv, .txt,
+# raw binary otherwise). --timing prints the seconds spent importing,
+# loading, computing and writing. numpy and the clustering modules are
+# only imported once the arguments parse; matplotlib and cv2 never are.
+
+import argparse
+import os
+import sys
+import time
+
+
+def load_array(path, dtype=None, dims=None):
+    import numpy as np
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r")
+    if extension in (".csv", ".txt"):
+        return np.loadtxt(path, delimiter="," if extension == ".csv" else None,
+                          dtype=dtype or np.float32, ndmin=2)
+    if dtype is None or dims is None:
+        raise ValueError("Raw binary input %s needs --dtype and --dims" % path)
+    return np.memmap(path, dtype=dtype, mode="r").reshape(-1, dims)
+
+
+def save_array(path, array):
+    import numpy as np
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        np.save(path, array)
+    elif extension in (".csv", ".txt"):
+        fmt = "%d" if array.dtype.kind in "iu" else "%.8g"
+        np.savetxt(path, array, fmt=fmt, delimiter="," if extension == ".csv" else " ")
+    else:
+        np.asarray(array).tofile(path)
+
+
+class Timer:
+    """Seconds spent in each named phase"""
+
+    def __init__(self):
+        self.phases = []
+
+    def phase(self, name):
+        self.phases.append((name, time.perf_counter()))
+
+    def report(self, out=sys.stderr):
+        end = time.perf_counter()
+        for (name, start), (_, stop) in zip(self.phases, self.phases[1:] + [(None, end)]):
+            print("%-8s %8.3fs" % (name, stop - start), file=out)
+        print("%-8s %8.3fs" % ("total", end - self.phases[0][1]), file=out)
+
+
+def run_kmeans(args, timer):
+    timer.phase("import")
+    import numpy as np
+    from kmeans import (TERM_CRITERIA_EPS, TERM_CRITERIA_MAX_ITER, histogram_kmeans, kmeans,
+                        minibatch_kmeans, select_k, value_histogram)
+
+    timer.phase("load")
+    data = load_array(args.data, args.dtype, args.dims)
+
+    timer.phase("compute")
+    criteria = (TERM_CRITERIA_EPS + TERM_CRITERIA_MAX_ITER, args.max_iter, args.eps)
+    if args.k == "auto":
+        low, high = args.k_range
+        selection = select_k(data, range(low, high + 1), args.criterion, criteria,
+                             workers=args.workers, seed=args.seed, algorithm=args.algorithm)
+        print("chosen K: %d (%s)" % (selection.k, args.criterion))
+        for k, score in sorted(selection.scores.items()):
+            print("  K=%-4d score %.6g  compactness %.6g" % (k, score, selection.inertia[k]))
+        compactness, labels, centers = selection.compactness, selection.labels, selection.centers
+    elif args.one_d:
+        # Only the histogram is clustered; labels are looked up per chunk
+        compactness, bin_labels, centers = histogram_kmeans(value_histogram(data, args.bins),
+                                                            int(args.k))
+        centers = centers.astype(np.float32).reshape(-1, 1)
+        labels = None
+        if args.labels:
+            labels = _label_values(data, bin_labels, args.labels if _is_raw(args.labels) else None)
+    elif args.minibatch:
+        # Labels for raw outputs are streamed straight to the file
+        raw = args.labels and _is_raw(args.labels)
+        compactness, labels, centers = minibatch_kmeans(
+            data, int(args.k), criteria, batch_size=args.batch_size,
+            labels_path=args.labels if raw else None, seed=args.seed)
+        if raw:
+            labels = None
+    else:
+        compactness, labels, centers = kmeans(data, int(args.k), None, criteria, args.attempts,
+                                              workers=args.workers, seed=args.seed,
+                                              algorithm=args.algorithm)
+    print("compactness: %.6g" % compactness)
+
+    timer.phase("write")
+    if args.labels and labels is not None:
+        save_array(args.labels, np.asarray(labels))
+    if args.centers:
+        save_array(args.centers, np.asarray(centers))
+
+
+def _is_raw(path):
+    return os.path.splitext(path)[1].lower() not in (".npy", ".csv", ".txt")
+
+
+def _label_values(data, bin_labels, labels_path, chunk_size=2 ** 24):
+    # Cluster of every sample, chunk by chunk; written straight to
+    # labels_path (raw int32) when given, so the labels never sit in memory
+    import numpy as np
+
+    values = data.reshape(-1)
+    chunks = (values[start:start + chunk_size] for start in range(0, len(values), chunk_size))
+    if labels_path is None:
+        return np.concatenate([_chunk_labels(chunk, bin_labels) for chunk in chunks]).reshape(-1, 1)
+    with open(labels_path, "wb") as out:
+        for chunk in chunks:
+            out.write(_chunk_labels(chunk, bin_labels).tobytes())
+    return None
+
+
+def _chunk_labels(chunk, bin_labels):
+    import numpy as np
+
+    chunk = np.asarray(chunk)
+    return bin_labels[chunk.astype(np.intp) if chunk.dtype.kind == "f" else chunk]
+
+
+def run_knn(args, timer):
+    timer.phase("import")
+    import numpy as np
+    from knn import KNNClassifier
+
+    timer.phase("load")
+    train = load_array(args.train, args.dtype, args.dims)
+    responses = np.asarray(load_array(args.responses)).ravel()
+    queries = load_array(args.queries, args.dtype, args.dims)
+
+    timer.phase("compute")
+    classifier = KNNClassifier(args.k, args.algorithm, n_probe=args.n_probe).fit(train, responses)
+    _, indices = classifier.kneighbors(queries)
+    predicted = classifier.vote(indices)
+
+    timer.phase("write")
+    if args.labels:
+        save_array(args.labels, predicted.reshape(-1, 1))
+    if args.neighbours:
+        save_array(args.neighbours, indices)
+
+
+def parse_args(argv=None):
+    # Shared by both subcommands, so they can follow the subcommand name
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--timing", action="store_true", help="print seconds per phase to stderr")
+    common.add_argument("--dtype", help="dtype of raw binary inputs, e.g. float32 or uint8")
+    common.add_argument("--dims", type=int, help="features per row of raw binary inputs")
+
+    parser = argparse.ArgumentParser(description="Headless k-means and kNN on data files")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    kmeans = commands.add_parser("kmeans", parents=[common], help="cluster the rows of a data file")
+    kmeans.add_argument("data")
+    kmeans.add_argument("--k", default="2", help="number of clusters, or 'auto'")
+    kmeans.add_argument("--k-range", nargs=2, type=int, default=(2, 10), metavar=("LOW", "HIGH"),
+                        help="K values tried by --k auto")
+    kmeans.add_argument("--criterion", default="silhouette", choices=["elbow", "silhouette", "gap"])
+    kmeans.add_argument("--algorithm", default="lloyd", choices=["lloyd", "hamerly", "elkan"])
+    kmeans.add_argument("--attempts", type=int, default=3)
+    kmeans.add_argument("--max-iter", type=int, default=100)
+    kmeans.add_argument("--eps", type=float, default=1e-4)
+    kmeans.add_argument("--minibatch", action="store_true", help="out-of-core mini-batch k-means")
+    kmeans.add_argument("--batch-size", type=int, default=1024)
+    kmeans.add_argument("--one-d", action="store_true",
+                        help="exact histogram k-means of integer values 0 .. bins-1")
+    kmeans.add_argument("--bins", type=int, default=256)
+    kmeans.add_argument("--workers", type=int, default=1)
+    kmeans.add_argument("--seed", type=int)
+    kmeans.add_argument("--labels", help="output file for the (N, 1) labels")
+    kmeans.add_argument("--centers", help="output file for the (K, dims) centers")
+
+    knn = commands.add_parser("knn", parents=[common], help="classify query rows against labelled training rows")
+    knn.add_argument("train")
+    knn.add_argument("responses")
+    knn.add_argument("queries")
+    knn.add_argument("--k", type=int, default=3)
+    knn.add_argument("--algorithm", default="kdtree", choices=["kdtree", "brute", "ivf"])
+    knn.add_argument("--n-probe", type=int, default=8)
+    knn.add_argument("--labels", help="output file for the predicted labels")
+    knn.add_argument("--neighbours", help="output file for the (N, k) neighbour indices")
+
+    args = parser.parse_args(argv)
+    if args.command == "kmeans" and args.k != "auto" and not args.k.isdigit():
+        parser.error("--k must be a number or 'auto'")
+    return args
+
+
+def main(argv=None):
+    timer = Timer()
+    timer.phase("parse")
+    args = parse_args(argv)
+    try:
+        if args.command == "kmeans":
+            run_kmeans(args, timer)
+        else:
+            run_knn(args, timer)
+    except ValueError as error:
+        print("error:", error, file=sys.stderr)
+        return 1
+    if args.timing:
+        timer.report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
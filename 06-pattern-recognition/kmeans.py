@@ -0,0 +1,824 @@
+###################### K-MEANS CLUSTERING ######################
+# A NumPy k-means with the same call and return layout as cv2.kmeans:
+    # compactness, labels, centers = kmeans(data, K, None, criteria, attempts, flags)
+    # compactness : sum of squared distances of the points to their centers
+    # labels      : (N, 1) int32 cluster index of every point
+    # centers     : (K, dims) float32 cluster centers
+# Lloyd iterations are vectorized: each assignment step is a blocked
+# matrix product, each update step a bincount per dimension.
+# KMEANS_PP_CENTERS seeds with k-means++, which usually needs far fewer
+# attempts than random centers. Independent attempts can run in a
+# process pool; the best (lowest compactness) one is returned.
+#
+# algorithm="elkan" / "hamerly" give the same result as Lloyd but keep
+# per-point distance bounds to skip most distance evaluations when K is
+# large; pass stats=KMeansStats() to count how many. Fewer evaluations
+# rarely means less time here, as Lloyd's are one matrix product.
+#
+# minibatch_kmeans handles data larger than RAM: it streams fixed-size
+# chunks from a np.memmap (or any chunk generator), updates the centers
+# from small batches, and streams the final labels to a file.
+#
+# kmeans_1d is exact for 1-D integer data such as 8-bit samples: the data
+# collapses into a histogram, on which dynamic programming finds the
+# globally optimal partition, at a cost independent of the sample count.
+#
+# select_k sweeps a range of K (warm-starting each K from the previous
+# one) and picks one by elbow, silhouette or gap statistic.
+
+import mmap
+import multiprocessing
+import os
+import tempfile
+from collections import namedtuple
+
+import numpy as np
+
+# Same values as the OpenCV constants, so criteria tuples carry over
+TERM_CRITERIA_COUNT = TERM_CRITERIA_MAX_ITER = 1
+TERM_CRITERIA_EPS = 2
+KMEANS_RANDOM_CENTERS = 0
+KMEANS_USE_INITIAL_LABELS = 1
+KMEANS_PP_CENTERS = 2
+
+DEFAULT_CRITERIA = (TERM_CRITERIA_EPS + TERM_CRITERIA_MAX_ITER, 100, 1e-4)
+
+# Candidates tried per k-means++ pick; the one lowering the potential most wins
+PP_TRIALS = 3
+
+
+class KMeansStats:
+    """Counters filled in by lloyd, hamerly and elkan"""
+
+    def __init__(self):
+        self.iterations = 0
+        self.distances = 0  # point-to-center distances computed
+        self.lloyd_distances = 0  # what plain Lloyd computes for as many passes
+
+    @property
+    def skipped(self):
+        # Fraction of Lloyd's distance evaluations avoided
+        if not self.lloyd_distances:
+            return 0.0
+        return 1 - self.distances / self.lloyd_distances
+
+    def as_dict(self):
+        return {
+            "iterations": self.iterations,
+            "distances": self.distances,
+            "lloyd_distances": self.lloyd_distances,
+            "skipped": self.skipped,
+        }
+
+    def __repr__(self):
+        return ("KMeansStats(iterations=%d, distances=%d, lloyd_distances=%d, skipped=%.3f)"
+                % (self.iterations, self.distances, self.lloyd_distances, self.skipped))
+
+
+def kmeans(data, k, best_labels=None, criteria=DEFAULT_CRITERIA, attempts=1,
+           flags=KMEANS_PP_CENTERS, workers=1, seed=None, algorithm="lloyd"):
+    """Cluster the rows of `data` into k groups.
+
+    Arguments follow cv2.kmeans. best_labels is only read when flags
+    include KMEANS_USE_INITIAL_LABELS (for the first attempt). workers > 1
+    (None for one per CPU) spreads the attempts over a process pool.
+    algorithm is "lloyd", "hamerly" (one lower bound per point) or
+    "elkan" (k lower bounds per point); all three give the same
+    clustering, up to float rounding of near ties. The bounds cut
+    distance evaluations, not wall time: Lloyd's blocked matrix product
+    is usually faster in NumPy.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError("Unknown algorithm %r, expected one of %s"
+                         % (algorithm, ", ".join(ALGORITHMS)))
+    data = _as_points(data)
+    if not 1 <= k <= len(data):
+        raise ValueError("Need 1 <= k <= %d points, got k=%d" % (len(data), k))
+    max_iter, eps = parse_criteria(criteria)
+
+    initial = None
+    if flags & KMEANS_USE_INITIAL_LABELS:
+        if best_labels is None:
+            raise ValueError("KMEANS_USE_INITIAL_LABELS needs best_labels")
+        initial = np.asarray(best_labels).ravel()
+    init = "++" if flags & KMEANS_PP_CENTERS else "random"
+
+    # One independent random stream per attempt, so the result does not
+    # depend on how attempts are spread over workers
+    seeds = np.random.SeedSequence(seed).spawn(attempts)
+    tasks = [(k, max_iter, eps, init, initial if attempt == 0 else None, seeds[attempt], algorithm)
+             for attempt in range(attempts)]
+
+    results = _map(data, _attempt, tasks, workers)
+    compactness, labels, centers = min(results, key=lambda result: result[0])
+    return compactness, labels.reshape(-1, 1).astype(np.int32), centers.astype(np.float32)
+
+
+def parse_criteria(criteria):
+    # (type, max_iter, epsilon) -> (max_iter, squared epsilon), with
+    # OpenCV's defaults for the parts that `type` leaves out
+    kind, max_iter, eps = criteria
+    if not kind & TERM_CRITERIA_MAX_ITER:
+        max_iter = 100
+    if not kind & TERM_CRITERIA_EPS:
+        eps = np.finfo(np.float32).eps
+    return max(int(max_iter), 1), max(eps, 0.0) ** 2
+
+
+def _as_points(data):
+    # cv2.kmeans takes float32 rows; a 1-D array is one feature per row.
+    # asanyarray keeps a np.memmap a memmap, see _map.
+    data = np.asanyarray(data)
+    if data.ndim == 1:
+        data = data.reshape(-1, 1)
+    if data.ndim != 2:
+        raise ValueError("Expected a 2-D array of points, got shape %s" % (data.shape,))
+    return data.astype(np.result_type(data.dtype, np.float32), copy=False)
+
+
+# ---------------------------- LLOYD ---------------------------------
+
+def assign(data, centers, block_size=4096):
+    """Index of and squared distance to the nearest center of every row"""
+    # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2 picks the nearest center;
+    # ||x||^2 does not change the argmin. In float32 the identity cancels
+    # badly far from the origin, so both sides are shifted by the mean
+    # center first, and the distances returned are exact differences.
+    origin = centers.mean(axis=0)
+    shifted = centers - origin
+    center_norms = np.einsum("ij,ij->i", shifted, shifted)
+    scaled = -2 * shifted.T
+    labels = np.empty(len(data), dtype=np.intp)
+    distances = np.empty(len(data), dtype=centers.dtype)
+    for start in range(0, len(data), block_size):
+        block = np.asarray(data[start:start + block_size], dtype=centers.dtype)
+        dist = (block - origin) @ scaled
+        dist += center_norms
+        nearest = dist.argmin(axis=1)
+        labels[start:start + block_size] = nearest
+        diff = block - centers[nearest]
+        distances[start:start + block_size] = np.einsum("ij,ij->i", diff, diff)
+    return labels, distances
+
+
+def update_centers(data, labels, distances, centers):
+    # Mean of every cluster, one bincount per dimension. An empty cluster
+    # takes the point farthest from its own center, like cv2.kmeans.
+    k = len(centers)
+    counts = np.bincount(labels, minlength=k)
+    sums = np.stack([np.bincount(labels, data[:, dim], k) for dim in range(data.shape[1])], axis=1)
+    new_centers = np.empty_like(centers)
+    filled = counts > 0
+    new_centers[filled] = sums[filled] / counts[filled, None]
+    if not filled.all():
+        distances = distances.copy()
+        for cluster in np.flatnonzero(~filled):
+            farthest = int(distances.argmax())
+            new_centers[cluster] = data[farthest]
+            distances[farthest] = 0
+    return new_centers
+
+
+def lloyd(data, centers, max_iter, eps, stats=None):
+    """Lloyd iterations from the given centers until no center moves by
+    more than sqrt(eps) or max_iter is reached; returns
+    (compactness, labels, centers)."""
+    centers = np.array(centers, dtype=data.dtype)
+    for _ in range(max_iter):
+        labels, distances = assign(data, centers)
+        new_centers = update_centers(data, labels, distances, centers)
+        shift = np.einsum("ij,ij->i", new_centers - centers, new_centers - centers).max()
+        centers = new_centers
+        _count(stats, len(data) * len(centers), len(data) * len(centers), iteration=True)
+        if shift <= eps:
+            break
+    labels, distances = assign(data, centers)
+    _count(stats, len(data) * len(centers), len(data) * len(centers))
+    return float(distances.sum(dtype=np.float64)), labels, centers
+
+
+def _count(stats, distances, lloyd_distances, iteration=False):
+    if stats is not None:
+        stats.distances += distances
+        stats.lloyd_distances += lloyd_distances
+        stats.iterations += iteration
+
+
+# --------------------- TRIANGLE INEQUALITY ---------------------------
+# Both keep an upper bound u on the distance of every point to its own
+# center and lower bounds on the distances to the others; after a center
+# moves by p, bounds shift by p. A point is only looked at when
+# u > max(lower bound, half the gap from its center to the nearest other
+# center), since otherwise no other center can be closer. Same
+# iterations, labels and centers as lloyd(), far fewer distances.
+
+def hamerly(data, centers, max_iter, eps, stats=None):
+    """Lloyd with Hamerly's bounds: one lower bound per point, on the
+    distance to its second closest center."""
+    data = np.asarray(data)
+    centers = np.array(centers, dtype=data.dtype)
+    n, k = len(data), len(centers)
+    labels, upper, lower = _two_nearest(data, centers)
+    _count(stats, n * k, n * k)
+
+    for _ in range(max_iter):
+        new_centers = update_centers(data, labels, upper ** 2, centers)
+        moved = _row_norms(new_centers - centers)
+        centers = new_centers
+        upper += moved[labels]
+        # The second closest center moved by at most the largest move of
+        # any center other than the point's own
+        largest = int(moved.argmax())
+        second = np.partition(moved, -2)[-2] if k > 1 else 0.0
+        lower -= np.where(labels == largest, second, moved[largest])
+
+        bound = np.maximum(0.5 * _nearest_center_gap(centers)[labels], lower)
+        check = np.flatnonzero(upper > bound)
+        # Tightening the upper bound often settles the point already
+        upper[check] = _pair_distances(data, check, centers, labels[check])
+        tightened = len(check)
+        check = check[upper[check] > bound[check]]
+        labels[check], upper[check], lower[check] = _two_nearest(data[check], centers)
+        _count(stats, tightened + len(check) * k, n * k, iteration=True)
+
+        if moved.max() ** 2 <= eps:
+            break
+    return _finish(data, centers, labels, upper, stats)
+
+
+def elkan(data, centers, max_iter, eps, stats=None):
+    """Lloyd with Elkan's bounds: a lower bound for every point and
+    center, so only pairs that could beat the current center are
+    measured. Needs len(data) * k floats for the bounds."""
+    data = np.asarray(data)
+    centers = np.array(centers, dtype=data.dtype)
+    n, k = len(data), len(centers)
+    lower = np.sqrt(_all_squared_distances(data, centers))
+    labels = lower.argmin(axis=1)
+    upper = lower[np.arange(n), labels]
+    _count(stats, n * k, n * k)
+
+    for _ in range(max_iter):
+        new_centers = update_centers(data, labels, upper ** 2, centers)
+        moved = _row_norms(new_centers - centers)
+        centers = new_centers
+        upper += moved[labels]
+        lower -= moved
+        np.maximum(lower, 0, out=lower)
+
+        half_gaps = 0.5 * _center_gaps(centers)
+        active = np.flatnonzero(upper > half_gaps.min(axis=1)[labels])
+        measured = 0
+        if len(active):
+            # Pairs (point, other center) that might beat the own center
+            own = labels[active]
+            maybe = (upper[active, None] > lower[active]) & (upper[active, None] > half_gaps[own])
+            maybe[np.arange(len(active)), own] = False
+            rows = np.flatnonzero(maybe.any(axis=1))
+
+            # Tighten the upper bound of those points first
+            upper[active[rows]] = _pair_distances(data, active[rows], centers, own[rows])
+            lower[active[rows], own[rows]] = upper[active[rows]]
+            measured += len(rows)
+            maybe[rows] &= ((upper[active[rows], None] > lower[active[rows]])
+                            & (upper[active[rows], None] > half_gaps[own[rows]]))
+
+            pair_rows, pair_centers = np.nonzero(maybe)
+            points = active[pair_rows]
+            dist = _pair_distances(data, points, centers, pair_centers)
+            lower[points, pair_centers] = dist
+            measured += len(dist)
+
+            # Move every point to its closest measured center, if that one
+            # beats its own
+            best = upper.copy()
+            np.minimum.at(best, points, dist)
+            moves = (dist < upper[points]) & (dist == best[points])
+            labels[points[moves]] = pair_centers[moves]
+            upper = best
+        _count(stats, measured, n * k, iteration=True)
+
+        if moved.max() ** 2 <= eps:
+            break
+    return _finish(data, centers, labels, upper, stats)
+
+
+def _finish(data, centers, labels, upper, stats):
+    # Upper bounds can be loose, compactness needs exact distances
+    exact = _pair_distances(data, np.arange(len(data)), centers, labels)
+    _count(stats, len(data), 0)
+    return float((exact.astype(np.float64) ** 2).sum()), labels, centers
+
+
+def _row_norms(vectors):
+    return np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+
+
+def _pair_distances(data, points, centers, center_ids, block_size=65536):
+    # Distance from data[points[i]] to centers[center_ids[i]], in blocks
+    dist = np.empty(len(points))
+    for start in range(0, len(points), block_size):
+        stop = start + block_size
+        dist[start:stop] = _row_norms(data[points[start:stop]] - centers[center_ids[start:stop]])
+    return dist
+
+
+def _all_squared_distances(data, centers):
+    # In float64 and shifted by the mean center, like assign: rounding in
+    # a bound could make it prune a closer center
+    origin = centers.mean(axis=0, dtype=np.float64)
+    data, centers = data.astype(np.float64) - origin, centers.astype(np.float64) - origin
+    dist = (np.einsum("ij,ij->i", data, data)[:, None] - 2 * (data @ centers.T)
+            + np.einsum("ij,ij->i", centers, centers))
+    return np.maximum(dist, 0, out=dist)
+
+
+def _two_nearest(data, centers):
+    # Closest center of every row, distance to it and to the second closest
+    dist = _all_squared_distances(data, centers)
+    labels = dist.argmin(axis=1)
+    rows = np.arange(len(data))
+    nearest = np.sqrt(dist[rows, labels])
+    dist[rows, labels] = np.inf
+    second = np.sqrt(dist.min(axis=1)) if len(centers) > 1 else np.full(len(data), np.inf)
+    return labels, nearest, second
+
+
+def _center_gaps(centers):
+    # Pairwise center distances, inf on the diagonal
+    gaps = np.sqrt(_all_squared_distances(centers, centers))
+    np.fill_diagonal(gaps, np.inf)
+    return gaps
+
+
+def _nearest_center_gap(centers):
+    return _center_gaps(centers).min(axis=1)
+
+
+# ------------------------ INITIALISATION ----------------------------
+
+def random_centers(data, k, rng):
+    # Uniform in the bounding box of the data (KMEANS_RANDOM_CENTERS)
+    low, high = data.min(axis=0), data.max(axis=0)
+    return rng.uniform(low, high, (k, data.shape[1])).astype(data.dtype)
+
+
+def kmeans_plus_plus(data, k, rng, trials=PP_TRIALS):
+    # Each new center is drawn with probability proportional to the squared
+    # distance to the closest center so far (greedy: best of `trials` draws)
+    centers = np.empty((k, data.shape[1]), dtype=data.dtype)
+    centers[0] = data[rng.integers(len(data))]
+    closest = _squared_distances_to(data, centers[0])
+
+    for i in range(1, k):
+        potential = closest.sum()
+        if potential > 0:
+            candidates = rng.choice(len(data), trials, p=closest / potential)
+        else:
+            candidates = rng.integers(len(data), size=trials)  # all points covered
+        best = None
+        for candidate in candidates:
+            trial = np.minimum(closest, _squared_distances_to(data, data[candidate]))
+            if best is None or trial.sum() < best[0]:
+                best = (trial.sum(), candidate, trial)
+        _, chosen, closest = best
+        centers[i] = data[chosen]
+    return centers
+
+
+def centers_from_labels(data, labels, k):
+    labels = labels.astype(np.intp)
+    distances = np.zeros(len(data), dtype=data.dtype)
+    return update_centers(data, labels, distances, np.zeros((k, data.shape[1]), dtype=data.dtype))
+
+
+def _squared_distances_to(data, point):
+    diff = data - point
+    return np.einsum("ij,ij->i", diff, diff).astype(np.float64)
+
+
+def _attempt(data, k, max_iter, eps, init, initial_labels, seed, algorithm):
+    rng = np.random.default_rng(seed)
+    if initial_labels is not None:
+        centers = centers_from_labels(data, initial_labels, k)
+    elif init == "++":
+        centers = kmeans_plus_plus(data, k, rng)
+    else:
+        centers = random_centers(data, k, rng)
+    return ALGORITHMS[algorithm](data, centers, max_iter, eps)
+
+
+# --------------------------- MINI-BATCH -----------------------------
+
+def iter_chunks(data, chunk_size):
+    """Yield `data` as in-memory float blocks of at most chunk_size rows.
+
+    `data` is an array (a np.memmap is read one chunk at a time) or a
+    callable returning a fresh iterator of 2-D chunks, e.g. a reader
+    parsing a large text file piece by piece.
+    """
+    if callable(data):
+        for chunk in data():
+            yield _as_points(np.asarray(chunk))
+        return
+    for start in range(0, len(data), chunk_size):
+        yield _as_points(np.asarray(data[start:start + chunk_size]))
+
+
+def sample_rows(data, size, rng, chunk_size=65536):
+    # Uniform sample without replacement: random rows of an array, or the
+    # rows with the `size` smallest random keys over one streamed pass
+    if not callable(data):
+        rows = np.sort(rng.choice(len(data), min(size, len(data)), replace=False))
+        return _as_points(np.asarray(data[rows]))
+    sample, keys = None, np.empty(0)
+    for chunk in iter_chunks(data, chunk_size):
+        sample = chunk if sample is None else np.concatenate((sample, chunk))
+        keys = np.concatenate((keys, rng.random(len(chunk))))
+        if len(keys) > size:
+            keep = np.argpartition(keys, size - 1)[:size]
+            sample, keys = sample[keep], keys[keep]
+    return sample
+
+
+def minibatch_kmeans(data, k, criteria=DEFAULT_CRITERIA, batch_size=1024, chunk_size=65536,
+                     init_size=None, labels_path=None, seed=None):
+    """Mini-batch k-means over data streamed in chunks (see iter_chunks).
+
+    Centers start from k-means++ on a sample of init_size rows. Each pass
+    reads the data once, chunk by chunk, shuffles every chunk and moves
+    the centers towards each batch of batch_size rows with a per-center
+    learning rate of 1 / (points seen by that center). criteria gives the
+    number of passes and the center shift that stops them early.
+
+    A last pass assigns every row; labels go to `labels_path` as raw int32
+    (returned as a read-only np.memmap of shape (N, 1)), or stay in memory
+    when no path is given. Peak memory is a few chunks, whatever N is.
+    Returns (compactness, labels, centers) like kmeans().
+    """
+    max_iter, eps = parse_criteria(criteria)
+    rng = np.random.default_rng(seed)
+    if init_size is None:
+        init_size = max(3 * k, 3 * batch_size)
+
+    sample = sample_rows(data, init_size, rng, chunk_size)
+    if len(sample) < k:
+        raise ValueError("Need at least k=%d points, got %d" % (k, len(sample)))
+    centers = kmeans_plus_plus(sample, k, rng).astype(np.float64)
+    seen = np.zeros(k)
+
+    for _ in range(max_iter):
+        previous = centers.copy()
+        for chunk in iter_chunks(data, chunk_size):
+            chunk = chunk[rng.permutation(len(chunk))]
+            for start in range(0, len(chunk), batch_size):
+                batch = chunk[start:start + batch_size]
+                labels, _ = assign(batch, centers.astype(batch.dtype))
+
+                # Same as a 1 / count step per point, summed per center
+                counts = np.bincount(labels, minlength=k)
+                sums = np.stack([np.bincount(labels, batch[:, dim], k)
+                                 for dim in range(batch.shape[1])], axis=1)
+                hit = counts > 0
+                seen[hit] += counts[hit]
+                centers[hit] += (sums[hit] - counts[hit, None] * centers[hit]) / seen[hit, None]
+
+        shift = np.einsum("ij,ij->i", centers - previous, centers - previous).max()
+        if shift <= eps:
+            break
+
+    centers = centers.astype(np.float32)
+    compactness, labels = _streaming_labels(data, centers, chunk_size, labels_path)
+    return compactness, labels, centers
+
+
+def _streaming_labels(data, centers, chunk_size, labels_path):
+    compactness, count, in_memory = 0.0, 0, []
+    out = open(labels_path, "wb") if labels_path is not None else None
+    try:
+        for chunk in iter_chunks(data, chunk_size):
+            labels, distances = assign(chunk, centers.astype(chunk.dtype))
+            compactness += float(distances.sum(dtype=np.float64))
+            count += len(chunk)
+            if out is not None:
+                out.write(labels.astype(np.int32).tobytes())
+            else:
+                in_memory.append(labels.astype(np.int32))
+    finally:
+        if out is not None:
+            out.close()
+
+    if labels_path is None:
+        return compactness, np.concatenate(in_memory).reshape(-1, 1)
+    return compactness, np.memmap(labels_path, dtype=np.int32, mode="r", shape=(count, 1))
+
+
+# ------------------------- 1-D HISTOGRAM ----------------------------
+
+def value_histogram(values, bins=256, chunk_size=2 ** 24):
+    """Counts of the integer values 0 .. bins-1 in `values`, an array
+    (read chunk_size samples at a time, so a np.memmap of billions of
+    samples never gets copied whole) or a callable returning chunks."""
+    counts = np.zeros(bins, dtype=np.int64)
+    chunks = values() if callable(values) else (
+        values.ravel()[start:start + chunk_size]
+        for start in range(0, np.size(values), chunk_size))
+    for chunk in chunks:
+        chunk = np.asarray(chunk).ravel()
+        if chunk.dtype.kind == "f":
+            if not np.array_equal(chunk, np.floor(chunk)):
+                raise ValueError("kmeans_1d needs integer values")
+            chunk = chunk.astype(np.intp)
+        if len(chunk) and (chunk.min() < 0 or chunk.max() >= bins):
+            raise ValueError("Values must lie in 0 .. %d" % (bins - 1))
+        counts += np.bincount(chunk, minlength=bins)
+    return counts
+
+
+def histogram_kmeans(histogram, k):
+    """Globally optimal 1-D k-means on a histogram (counts of the values
+    0, 1, ..., len(histogram)-1).
+
+    Optimal 1-D clusters are runs of consecutive values, so with B
+    occupied bins, best[j] (lowest cost of the first bins 0..j split into
+    m clusters) follows from the m-1 cluster table in one vectorized
+    O(B^2) step. Returns (compactness, bin_labels, centers): bin_labels
+    maps every value to its nearest center's cluster (also for values not
+    seen), centers are sorted ascending.
+    """
+    histogram = np.asarray(histogram)
+    occupied = np.flatnonzero(histogram)
+    if not 1 <= k <= len(occupied):
+        raise ValueError("Need 1 <= k <= %d distinct values, got k=%d" % (len(occupied), k))
+    x = occupied.astype(np.float64)
+    w = histogram[occupied].astype(np.float64)
+    size = len(x)
+
+    # cost[i, j]: squared error of bins i..j as one cluster, from prefix
+    # sums of w, w*x and w*x^2 (inf when i > j)
+    weight = np.concatenate(([0], np.cumsum(w)))
+    first = np.concatenate(([0], np.cumsum(w * x)))
+    second = np.concatenate(([0], np.cumsum(w * x * x)))
+    i, j = np.triu_indices(size)
+    cost = np.full((size, size), np.inf)
+    sums = first[j + 1] - first[i]
+    cost[i, j] = np.maximum(second[j + 1] - second[i] - sums * sums / (weight[j + 1] - weight[i]), 0)
+
+    best = cost[0]
+    starts = []
+    for _ in range(1, k):
+        # Last cluster covers bins start..j, the others bins 0..start-1
+        total = best[:-1, None] + cost[1:]
+        start = total.argmin(axis=0) + 1
+        best = total[start - 1, np.arange(size)]
+        starts.append(start)
+
+    # Walk the split points back from the last bin
+    bounds, end = [size], size - 1
+    for start in reversed(starts):
+        bounds.append(start[end])
+        end = start[end] - 1
+    bounds.append(0)
+    bounds.reverse()
+
+    centers = np.array([first[b] - first[a] for a, b in zip(bounds, bounds[1:])])
+    centers /= [weight[b] - weight[a] for a, b in zip(bounds, bounds[1:])]
+    midpoints = (centers[1:] + centers[:-1]) / 2
+    bin_labels = np.searchsorted(midpoints, np.arange(len(histogram)), side="right")
+    return float(best[-1]), bin_labels.astype(np.int32), centers
+
+
+def kmeans_1d(values, k, bins=256):
+    """Exact k-means of integer values in 0 .. bins-1 (e.g. 8-bit
+    samples), with the same (compactness, labels, centers) return as
+    kmeans(); no restarts needed. For streams too large to label in
+    memory, use value_histogram + histogram_kmeans and look labels up in
+    bin_labels chunk by chunk."""
+    values = np.asarray(values).ravel()
+    compactness, bin_labels, centers = histogram_kmeans(value_histogram(values, bins), k)
+    # Integer samples index bin_labels as they are (no 8-byte copy of
+    # 8-bit data); only floats, checked integral above, are converted
+    if values.dtype.kind == "f":
+        values = values.astype(np.intp)
+    labels = bin_labels[values].reshape(-1, 1)
+    return compactness, labels, centers.astype(np.float32).reshape(-1, 1)
+
+
+ALGORITHMS = {
+    "lloyd": lloyd,
+    "hamerly": hamerly,
+    "elkan": elkan,
+}
+
+
+# -------------------------- K SELECTION -----------------------------
+
+# k            : chosen number of clusters
+# scores       : {K: score} for the chosen criterion
+# inertia      : {K: compactness} for every K tried
+# compactness, labels, centers : the model for k, laid out like kmeans()
+KSelection = namedtuple("KSelection", ["k", "scores", "inertia", "compactness", "labels", "centers"])
+
+SELECTION_CRITERIA = ("elbow", "silhouette", "gap")
+
+
+def select_k(data, k_values, criterion="silhouette", criteria=DEFAULT_CRITERIA, workers=1,
+             seed=None, sample_size=1000, references=5, algorithm="lloyd"):
+    """Cluster `data` for every K in k_values and choose one.
+
+    criterion:
+        "elbow"      : K farthest below the chord of the inertia curve
+        "silhouette" : best mean silhouette on sample_size points (K >= 2)
+        "gap"        : gap statistic against `references` uniform data sets
+                       in the bounding box; smallest K with
+                       gap(K) >= gap(K + 1) - s(K + 1)
+    K values are run in increasing order, each one starting from the
+    previous centers plus k-means++ draws for the new ones, which takes
+    far fewer iterations than a cold start. The K range is cut into one
+    contiguous warm-started segment per worker, and every gap reference
+    sweep is a task of its own, all in one process pool.
+    """
+    if criterion not in SELECTION_CRITERIA:
+        raise ValueError("Unknown criterion %r, expected one of %s"
+                         % (criterion, ", ".join(SELECTION_CRITERIA)))
+    data = _as_points(data)
+    k_values = sorted(set(int(k) for k in k_values))
+    if not k_values or k_values[0] < 1 or k_values[-1] > len(data):
+        raise ValueError("K values must lie in 1 .. %d" % len(data))
+    max_iter, eps = parse_criteria(criteria)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    segments = [segment.tolist() for segment in np.array_split(k_values, min(workers, len(k_values)))]
+    num_references = references if criterion == "gap" else 0
+    seeds = np.random.SeedSequence(seed).spawn(len(segments) + num_references + 1)
+
+    tasks = [(_sweep_task, (segment, max_iter, eps, algorithm, seeds[i]))
+             for i, segment in enumerate(segments)]
+    if num_references:
+        low, high = np.asarray(data.min(axis=0)), np.asarray(data.max(axis=0))
+        size = min(len(data), max(sample_size, 10 * k_values[-1]))
+        tasks += [(_reference_task, (low, high, size, k_values, max_iter, eps, algorithm,
+                                     seeds[len(segments) + i]))
+                  for i in range(num_references)]
+    results = _map(data, _run_task, tasks, workers)
+
+    models = {}
+    for segment, sweep in zip(segments, results[:len(segments)]):
+        models.update(zip(segment, sweep))
+    inertia = {k: models[k][0] for k in k_values}
+    rng = np.random.default_rng(seeds[-1])
+
+    if criterion == "elbow":
+        scores = _elbow_scores(k_values, inertia)
+    elif criterion == "silhouette":
+        scores = _silhouette_scores(data, models, sample_size, rng)
+    else:
+        scores, spread = _gap_scores(len(data), inertia, results[len(segments):])
+
+    if criterion == "gap":
+        k = k_values[-1]
+        for this, following in zip(k_values, k_values[1:]):
+            if scores[this] >= scores[following] - spread[following]:
+                k = this
+                break
+    else:
+        valid = [k for k in k_values if not np.isnan(scores[k])]
+        if not valid:
+            raise ValueError("The silhouette needs some K >= 2")
+        k = max(valid, key=lambda k: scores[k])
+
+    compactness, centers = models[k]
+    labels, _ = assign(data, centers)
+    return KSelection(k, scores, inertia, compactness,
+                      labels.reshape(-1, 1).astype(np.int32), centers.astype(np.float32))
+
+
+def _run_task(data, function, args):
+    return function(data, *args)
+
+
+def _sweep_task(data, k_values, max_iter, eps, algorithm, seed):
+    # [(compactness, centers)] for increasing K, each warm-started
+    rng = np.random.default_rng(seed)
+    centers = kmeans_plus_plus(data, k_values[0], rng)
+    sweep = []
+    for k in k_values:
+        centers = _grow_centers(data, centers, k, rng)
+        compactness, _, centers = ALGORITHMS[algorithm](data, centers, max_iter, eps)
+        sweep.append((compactness, centers))
+    return sweep
+
+
+def _grow_centers(data, centers, k, rng):
+    # Add k-means++ draws (probability ~ squared distance) up to k centers
+    while len(centers) < k:
+        _, distances = assign(data, centers)
+        distances = distances.astype(np.float64)
+        total = distances.sum()
+        chosen = rng.choice(len(data), p=distances / total) if total > 0 else rng.integers(len(data))
+        centers = np.vstack((centers, data[chosen]))
+    return centers
+
+
+def _reference_task(data, low, high, size, k_values, max_iter, eps, algorithm, seed):
+    # log of the mean inertia of a uniform data set, for every K
+    rng = np.random.default_rng(seed)
+    reference = rng.uniform(low, high, (size, len(low))).astype(data.dtype)
+    sweep = _sweep_task(reference, k_values, max_iter, eps, algorithm, rng)
+    return [np.log(max(compactness / size, np.finfo(float).tiny)) for compactness, _ in sweep]
+
+
+def _elbow_scores(k_values, inertia):
+    # Distance below the chord from the first to the last point, with
+    # both axes scaled to 0 .. 1
+    x = np.array(k_values, dtype=np.float64)
+    y = np.array([inertia[k] for k in k_values])
+    x = (x - x[0]) / max(x[-1] - x[0], 1)
+    y = (y - y.min()) / max(y.max() - y.min(), np.finfo(float).tiny)
+    chord = y[0] + (y[-1] - y[0]) * x
+    return dict(zip(k_values, (chord - y).tolist()))
+
+
+def _silhouette_scores(data, models, sample_size, rng):
+    rows = np.sort(rng.choice(len(data), min(sample_size, len(data)), replace=False))
+    sample = np.asarray(data[rows])
+    distances = np.sqrt(_all_squared_distances(sample, sample))
+    scores = {}
+    for k, (_, centers) in models.items():
+        scores[k] = silhouette(distances, assign(sample, centers)[0], k) if k > 1 else np.nan
+    return scores
+
+
+def silhouette(distances, labels, k):
+    """Mean silhouette from a square matrix of pairwise distances"""
+    rows = np.arange(len(labels))
+    members = np.zeros((len(labels), k))
+    members[rows, labels] = 1
+    counts = members.sum(axis=0)
+    totals = distances @ members  # summed distance of every point to every cluster
+
+    own = counts[labels]
+    inside = totals[rows, labels] / np.maximum(own - 1, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        others = totals / counts
+    others[:, counts == 0] = np.inf
+    others[rows, labels] = np.inf
+    nearest = others.min(axis=1)
+
+    # Singletons, and points with no other cluster in the sample, score 0
+    score = np.zeros(len(labels))
+    scored = (own > 1) & np.isfinite(nearest)
+    larger = np.maximum(inside[scored], nearest[scored])
+    score[scored] = np.where(larger > 0, (nearest[scored] - inside[scored]) / np.where(larger > 0, larger, 1), 0)
+    return float(score.mean())
+
+
+def _gap_scores(size, inertia, reference_logs):
+    reference_logs = np.array(reference_logs)  # references x K
+    expected = reference_logs.mean(axis=0)
+    spread = reference_logs.std(axis=0) * np.sqrt(1 + 1 / len(reference_logs))
+    k_values = sorted(inertia)
+    gaps = {k: float(expected[i] - np.log(max(inertia[k] / size, np.finfo(float).tiny)))
+            for i, k in enumerate(k_values)}
+    return gaps, dict(zip(k_values, spread.tolist()))
+
+
+# ---------------------------- PARALLEL ------------------------------
+
+def _map(data, function, tasks, workers):
+    # [function(data, *task) for task in tasks], over a process pool when
+    # workers > 1 (None for one per CPU)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        return [function(data, *task) for task in tasks]
+
+    # Workers map the data read-only instead of receiving a pickled copy
+    # per task: a np.memmap (not a slice of one, whose offset attribute is
+    # stale) is reopened from its own file, anything else is written once
+    # to a temporary file
+    with tempfile.TemporaryDirectory() as tmp:
+        if isinstance(data, np.memmap) and isinstance(data.base, mmap.mmap):
+            source = (data.filename, data.dtype.str, data.shape, data.offset)
+        else:
+            path = os.path.join(tmp, "data.bin")
+            np.ascontiguousarray(data).tofile(path)
+            source = (path, data.dtype.str, data.shape, 0)
+
+        with multiprocessing.Pool(min(workers, len(tasks)), initializer=_attach_worker,
+                                  initargs=source) as pool:
+            return pool.map(_worker_call, [(function, task) for task in tasks], chunksize=1)
+
+
+# Per-worker state, set once by the pool initializer
+_worker = {}
+
+
+def _attach_worker(path, dtype, shape, offset):
+    _worker["data"] = np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=offset)
+
+
+def _worker_call(call):
+    function, task = call
+    return function(_worker["data"], *task)
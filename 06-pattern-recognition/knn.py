@@ -0,0 +1,504 @@
+###################### K-NEAREST NEIGHBOURS ######################
+# KNNClassifier gives a fit / predict workflow over the float32
+# `trainData` / `responses` arrays of 01-knn.py. Neighbours come from a
+# KD-tree, so a query only visits the few leaves whose bounding boxes can
+# still hold one of its k nearest points instead of scanning the whole
+# training set.
+#
+# For large, higher-dimensional training sets, IVFIndex trades exactness
+# for speed: points are bucketed by their nearest k-means centroid and a
+# query only scans the `n_probe` buckets closest to it.
+#
+# BruteForceIndex is the exact fallback for high-dimensional data, where
+# KD-tree pruning stops working: distances come from matrix products over
+# tiles of queries and training points, so memory stays bounded by the
+# block size however large either side gets.
+#
+# StreamingIndex wraps any of them so labelled points can keep arriving
+# (KNNClassifier.add) while queries are served; see its docstring.
+
+import threading
+from heapq import heappop, heappush
+
+import numpy as np
+
+from kmeans import assign, lloyd
+
+
+class KDTree:
+    """KD-tree over the rows of `data`, split at the median of the widest axis"""
+
+    def __init__(self, data, leaf_size=32):
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise ValueError("Expected a 2-D array of points, got shape %s" % (data.shape,))
+        self.leaf_size = leaf_size
+
+        # Points are reordered so that every node covers a contiguous slice;
+        # `index` maps a position back to the row in the original data
+        self.points = np.array(data, dtype=np.result_type(data.dtype, np.float32))
+        self.index = np.arange(len(data))
+
+        # Flat node arrays: slice [start, end), children (-1 for leaves)
+        # and bounding box [lo, hi]
+        self._start, self._end, self._left, self._right = [], [], [], []
+        self._lo, self._hi = [], []
+        self._build()
+
+    def _new_node(self, start, end):
+        self._start.append(start)
+        self._end.append(end)
+        self._left.append(-1)
+        self._right.append(-1)
+        if end > start:
+            self._lo.append(self.points[start:end].min(axis=0))
+            self._hi.append(self.points[start:end].max(axis=0))
+        else:
+            self._lo.append(np.full(self.points.shape[1], np.inf))
+            self._hi.append(np.full(self.points.shape[1], -np.inf))
+        return len(self._start) - 1
+
+    def _build(self):
+        # Iterative build, no recursion limit on deep trees
+        stack = [self._new_node(0, len(self.points))]
+        while stack:
+            node = stack.pop()
+            start, end = self._start[node], self._end[node]
+            if end - start <= self.leaf_size:
+                continue
+
+            # Split the widest dimension at its median
+            spread = self._hi[node] - self._lo[node]
+            dim = int(np.argmax(spread))
+            if spread[dim] == 0:
+                continue  # all points identical, keep as a leaf
+            mid = (start + end) // 2
+            order = np.argpartition(self.points[start:end, dim], mid - start)
+            self.points[start:end] = self.points[start:end][order]
+            self.index[start:end] = self.index[start:end][order]
+
+            self._left[node] = self._new_node(start, mid)
+            self._right[node] = self._new_node(mid, end)
+            stack.extend((self._left[node], self._right[node]))
+
+        self._lo, self._hi = np.array(self._lo), np.array(self._hi)
+
+    def query(self, queries, k=1):
+        """Return (distances, indices) of the k nearest rows for each query.
+
+        Both arrays have shape (len(queries), k), sorted by increasing
+        Euclidean distance; indices refer to rows of the original data.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=self.points.dtype))
+        k = min(k, len(self.points))
+        distances = np.empty((len(queries), k))
+        indices = np.empty((len(queries), k), dtype=np.intp)
+        for row, query in enumerate(queries):
+            distances[row], indices[row] = self._query_one(query, k)
+        return distances, indices
+
+    def _query_one(self, query, k):
+        best_dist = np.full(k, np.inf)
+        best_pos = np.full(k, -1, dtype=np.intp)
+        worst = np.inf
+
+        # Best-first over nodes, ordered by squared distance to their box.
+        # Once the nearest box is farther than the current k-th neighbour,
+        # nothing left can improve the result.
+        heap = [(0.0, 0)]
+        while heap:
+            box_dist, node = heappop(heap)
+            if box_dist > worst:
+                break
+
+            left = self._left[node]
+            if left < 0:
+                start, end = self._start[node], self._end[node]
+                diff = self.points[start:end] - query
+                dist = np.einsum("ij,ij->i", diff, diff)
+
+                # Merge the leaf into the running top-k
+                cand_dist = np.concatenate((best_dist, dist))
+                cand_pos = np.concatenate((best_pos, np.arange(start, end)))
+                keep = np.argpartition(cand_dist, k - 1)[:k]
+                best_dist, best_pos = cand_dist[keep], cand_pos[keep]
+                worst = best_dist.max()
+                continue
+
+            for child in (left, self._right[node]):
+                gap = np.maximum(self._lo[child] - query, 0) + np.maximum(query - self._hi[child], 0)
+                heappush(heap, (float(gap @ gap), child))
+
+        order = np.argsort(best_dist, kind="stable")
+        return np.sqrt(best_dist[order]), self.index[best_pos[order]]
+
+
+class BruteForceIndex:
+    """Exact nearest neighbours by a blocked scan of all points.
+
+    Squared distances use ||a||^2 - 2 a.b + ||b||^2, one matrix product per
+    tile of `block_size` queries x `block_size` points, and a running top-k
+    per query is merged with argpartition after every tile. Peak extra
+    memory is about block_size * (block_size + k) distances.
+
+    In float32 that identity cancels badly for points far from the origin,
+    so both sides are first shifted by `center` (the mean of the data by
+    default), and the distances of the final top-k are recomputed from
+    the coordinate differences.
+    """
+
+    def __init__(self, data, block_size=1024, center=None, norms=None):
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise ValueError("Expected a 2-D array of points, got shape %s" % (data.shape,))
+        self.block_size = block_size
+        self.points = np.asarray(data, dtype=np.result_type(data.dtype, np.float32))
+        if center is None:
+            center = self.points.mean(axis=0) if len(self.points) else 0
+        self.center = np.broadcast_to(np.asarray(center, dtype=self.points.dtype),
+                                      self.points.shape[1:]).copy()
+        # Precomputed norms (from _norms with the same center) skip the pass
+        self.norms = _norms(self.points, self.center) if norms is None else norms
+
+    def query(self, queries, k=1):
+        """Return (distances, indices) of the k nearest rows, with the same
+        layout as KDTree.query."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=self.points.dtype))
+        k = min(k, len(self.points))
+        distances = np.empty((len(queries), k))
+        indices = np.empty((len(queries), k), dtype=np.intp)
+        for start in range(0, len(queries), self.block_size):
+            stop = start + self.block_size
+            distances[start:stop], indices[start:stop] = self._query_block(queries[start:stop], k)
+        return distances, indices
+
+    def _query_block(self, queries, k):
+        shifted = queries - self.center
+        query_norms = np.einsum("ij,ij->i", shifted, shifted)[:, None]
+        best_dist = np.full((len(queries), k), np.inf, dtype=self.points.dtype)
+        best_idx = np.full((len(queries), k), -1, dtype=np.intp)
+
+        for start in range(0, len(self.points), self.block_size):
+            block = self.points[start:start + self.block_size] - self.center
+            dist = query_norms - 2 * (shifted @ block.T) + self.norms[start:start + len(block)]
+
+            # Merge the tile into the running top-k of every query
+            cand_dist = np.concatenate((best_dist, dist), axis=1)
+            cand_idx = np.concatenate((best_idx, np.broadcast_to(
+                np.arange(start, start + len(block)), dist.shape)), axis=1)
+            keep = np.argpartition(cand_dist, k - 1, axis=1)[:, :k]
+            best_dist = np.take_along_axis(cand_dist, keep, axis=1)
+            best_idx = np.take_along_axis(cand_idx, keep, axis=1)
+
+        # Exact distances of the survivors, from coordinate differences
+        diff = self.points[best_idx] - queries[:, None, :]
+        best_dist = np.einsum("ijk,ijk->ij", diff, diff, dtype=np.float64)
+        order = np.argsort(best_dist, axis=1, kind="stable")
+        return (np.sqrt(np.take_along_axis(best_dist, order, axis=1)),
+                np.take_along_axis(best_idx, order, axis=1))
+
+
+def _norms(points, center):
+    # Squared norms of the rows of `points` shifted by `center`
+    shifted = points - center
+    return np.einsum("ij,ij->i", shifted, shifted)
+
+
+class IVFIndex:
+    """Approximate nearest neighbours over an inverted file of k-means cells.
+
+    `n_lists` cells are trained with a few Lloyd iterations on a sample of
+    the data. A query scans the points of its `n_probe` nearest cells:
+    more probes give higher recall and slower queries, n_probe = n_lists
+    is an exact (brute force) search.
+    """
+
+    def __init__(self, data, n_lists=None, n_probe=8, iterations=10,
+                 sample_size=256, seed=0):
+        data = np.asarray(data)
+        if data.ndim != 2:
+            raise ValueError("Expected a 2-D array of points, got shape %s" % (data.shape,))
+        if n_lists is None:
+            n_lists = max(int(np.sqrt(len(data))), 1)
+        n_lists = min(n_lists, len(data))
+        self.n_probe = n_probe
+
+        points = np.asarray(data, dtype=np.result_type(data.dtype, np.float32))
+        rng = np.random.default_rng(seed)
+        self.centroids = _train_centroids(points, n_lists, iterations,
+                                          sample_size * n_lists, rng)
+
+        # Points of cell c are points[offsets[c]:offsets[c + 1]], same layout
+        # as the CSR graphs of the searching chapter
+        cells, _ = assign(points, self.centroids)
+        order = np.argsort(cells, kind="stable")
+        self.points = points[order]
+        self.index = order
+        self.offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=n_lists), out=self.offsets[1:])
+        self._quantizer = BruteForceIndex(self.centroids)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def query(self, queries, k=1, n_probe=None):
+        """Return (distances, indices) of the approximate k nearest rows,
+        with the same layout as KDTree.query. Rows with fewer than k
+        candidates in their probed cells are padded with inf / -1."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=self.points.dtype))
+        n_probe = min(self.n_probe if n_probe is None else n_probe, self.n_lists)
+        k = min(k, len(self.points))
+
+        # Nearest cells of every query, by an exact scan of the centroids
+        _, probes = self._quantizer.query(queries, n_probe)
+
+        distances = np.full((len(queries), k), np.inf)
+        indices = np.full((len(queries), k), -1, dtype=np.intp)
+        for row, query in enumerate(queries):
+            positions = np.concatenate([np.arange(self.offsets[cell], self.offsets[cell + 1])
+                                        for cell in probes[row]])
+            diff = self.points[positions] - query
+            dist = np.einsum("ij,ij->i", diff, diff)
+            found = min(k, len(dist))
+            if found == 0:
+                continue
+            keep = np.argpartition(dist, found - 1)[:found]
+            keep = keep[np.argsort(dist[keep], kind="stable")]
+            distances[row, :found] = np.sqrt(dist[keep])
+            indices[row, :found] = self.index[positions[keep]]
+        return distances, indices
+
+
+def _train_centroids(points, n_lists, iterations, sample_size, rng):
+    # A few Lloyd iterations on a random sample; a coarse quantizer does
+    # not need converged centroids
+    if len(points) > sample_size:
+        points = points[rng.choice(len(points), sample_size, replace=False)]
+    centroids = points[rng.choice(len(points), n_lists, replace=False)]
+    _, _, centroids = lloyd(points, centroids, iterations, 0.0)
+    return centroids
+
+
+class GrowableArray:
+    """Rows appended in amortized O(1): capacity doubles when full.
+
+    Rows below `size` are never written again, and growing copies them
+    into a new array, so a view() taken earlier stays valid for readers.
+    """
+
+    def __init__(self, data):
+        self.data = np.array(data)
+        self.size = len(self.data)
+
+    def append(self, rows):
+        rows = np.asarray(rows, dtype=self.data.dtype).reshape((-1,) + self.data.shape[1:])
+        needed = self.size + len(rows)
+        if needed > len(self.data):
+            grown = np.empty((max(needed, 2 * len(self.data)),) + self.data.shape[1:],
+                             dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = rows
+        self.size = needed
+
+    def view(self):
+        return self.data[:self.size]
+
+    def __len__(self):
+        return self.size
+
+
+class StreamingIndex:
+    """Nearest-neighbour index that accepts new points while serving queries.
+
+    `index` (built by `build(points)`) covers the first points; later ones
+    land in an append buffer that queries scan by brute force and merge
+    with the index results. The squared norms used by that scan are
+    computed once per point, as it is added. Once the buffer grows past
+    `rebuild_ratio` times the indexed points, a background thread
+    rebuilds the index over everything and swaps it in, queries use the
+    old one until then. One thread may add points, any number may query.
+    """
+
+    def __init__(self, data, build, index=None, rebuild_ratio=0.1, min_rebuild=1024,
+                 background=True):
+        self.build = build
+        self.rebuild_ratio = rebuild_ratio
+        self.min_rebuild = min_rebuild
+        self.background = background
+
+        self._points = GrowableArray(np.asarray(data, dtype=np.result_type(np.asarray(data).dtype,
+                                                                           np.float32)))
+        points = self._points.view()
+        self._center = points.mean(axis=0) if len(points) else np.zeros(points.shape[1:], points.dtype)
+        self._norms = GrowableArray(_norms(points, self._center))
+        self._index = build(points) if index is None else index
+        self._indexed = len(self._points)
+        self._lock = threading.Lock()
+        self._rebuilder = None
+        self._rebuild_error = None
+
+    def __len__(self):
+        return len(self._points)
+
+    def add(self, points):
+        """Append points; they get the next ids and are searchable at once"""
+        points = np.asarray(points, dtype=self._points.data.dtype).reshape(
+            (-1,) + self._points.data.shape[1:])
+        norms = _norms(points, self._center)
+        with self._lock:
+            # Norms first: a query never sees a point without its norm
+            self._norms.append(norms)
+            self._points.append(points)
+            pending = len(self._points) - self._indexed
+        if pending > max(self.min_rebuild, self.rebuild_ratio * self._indexed):
+            self.compact(wait=not self.background)
+
+    def compact(self, wait=True):
+        """Rebuild the index over all points in a background thread.
+        With wait=True, return once every point added so far is indexed,
+        re-raising the exception of a failed rebuild."""
+        while True:
+            with self._lock:
+                if self._rebuilder is None:
+                    if self._indexed == len(self._points):
+                        return
+                    self._rebuild_error = None
+                    self._rebuilder = threading.Thread(target=self._rebuild, daemon=True)
+                    self._rebuilder.start()
+                rebuilder = self._rebuilder
+            if not wait:
+                return
+            # A rebuild that was already running may have missed later points
+            rebuilder.join()
+            with self._lock:
+                error, self._rebuild_error = self._rebuild_error, None
+            if error is not None:
+                raise error
+
+    def _rebuild(self):
+        # Always clear _rebuilder, or a failed build would block every
+        # later rebuild; the error is kept for compact(wait=True)
+        try:
+            with self._lock:
+                points = self._points.view()
+            index = self.build(points)
+            with self._lock:
+                self._index, self._indexed = index, len(points)
+        except BaseException as error:
+            with self._lock:
+                self._rebuild_error = error
+        finally:
+            with self._lock:
+                self._rebuilder = None
+
+    def query(self, queries, k=1):
+        """Return (distances, indices) over all points added so far, with
+        the same layout as the wrapped index."""
+        # Snapshot under the lock, search outside it
+        with self._lock:
+            index, indexed = self._index, self._indexed
+            points = self._points.view()
+            norms = self._norms.view()
+        k = min(k, len(points))
+        distances, indices = index.query(queries, k)
+        if len(points) == indexed:
+            return distances, indices
+
+        tail = BruteForceIndex(points[indexed:], center=self._center,
+                               norms=norms[indexed:len(points)])
+        pending_dist, pending_idx = tail.query(queries, k)
+        distances = np.concatenate((distances, pending_dist), axis=1)
+        indices = np.concatenate((indices, pending_idx + indexed), axis=1)
+        order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+class KNNClassifier:
+    """Majority vote among the k nearest training points.
+
+    `algorithm` picks the neighbour index:
+        "kdtree" : exact, fast in low dimensions (uses `leaf_size`)
+        "brute"  : exact blocked scan (uses `block_size`)
+        "ivf"    : approximate (uses `n_lists` and `n_probe`)
+    add() appends labelled points after fit, without a full rebuild.
+    """
+
+    ALGORITHMS = ("kdtree", "brute", "ivf")
+
+    def __init__(self, k=3, algorithm="kdtree", leaf_size=32, block_size=1024,
+                 n_lists=None, n_probe=8):
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError("Unknown algorithm %r, expected one of %s"
+                             % (algorithm, ", ".join(self.ALGORITHMS)))
+        self.k = k
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.block_size = block_size
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+
+    def fit(self, train_data, responses):
+        responses = np.asarray(responses).ravel()
+        if len(responses) != len(train_data):
+            raise ValueError("Got %d responses for %d training points"
+                             % (len(responses), len(train_data)))
+        self.train_data = np.asarray(train_data)
+        self.index = self._build_index(self.train_data)
+        self.responses = GrowableArray(responses)
+        self.classes = np.unique(responses)
+        return self
+
+    def _build_index(self, train_data):
+        if self.algorithm == "ivf":
+            return IVFIndex(train_data, self.n_lists, self.n_probe)
+        if self.algorithm == "brute":
+            return BruteForceIndex(train_data, self.block_size)
+        return KDTree(train_data, self.leaf_size)
+
+    def add(self, samples, responses):
+        """Append labelled training points to the fitted classifier"""
+        samples = np.atleast_2d(samples)
+        responses = np.asarray(responses).ravel()
+        if len(responses) != len(samples):
+            raise ValueError("Got %d responses for %d training points"
+                             % (len(responses), len(samples)))
+        if not isinstance(self.index, StreamingIndex):
+            self.index = StreamingIndex(self.train_data, self._build_index, index=self.index)
+            self.train_data = None  # now held by the streaming index
+
+        # Labels (and classes) first: a query that sees a new point must
+        # also find its label
+        self.responses.append(responses)
+        self.classes = np.union1d(self.classes, responses)
+        self.index.add(samples)
+        return self
+
+    def kneighbors(self, samples, k=None):
+        """(distances, indices) of the k nearest training points"""
+        return self.index.query(samples, self.k if k is None else k)
+
+    def predict(self, samples, k=None):
+        _, indices = self.kneighbors(samples, k)
+        return self.vote(indices)
+
+    def vote(self, indices):
+        """Majority class of every row of neighbour indices (from kneighbors)"""
+        # Vote counts per sample and class; ties go to the smaller class.
+        # Padding (-1) from an approximate index casts no vote.
+        votes = np.zeros((len(indices), len(self.classes)), dtype=np.intp)
+        rows = np.repeat(np.arange(len(indices)), indices.shape[1])
+        found = indices.ravel() >= 0
+        codes = np.searchsorted(self.classes, self.responses.view()[indices.ravel()[found]])
+        np.add.at(votes, (rows[found], codes), 1)
+        return self.classes[votes.argmax(axis=1)]
+
+    def find_nearest(self, samples, k=None):
+        """Same return layout as OpenCV's KNearest.findNearest:
+        (ret, results, neighbour_responses, squared_distances)"""
+        distances, indices = self.kneighbors(samples, k)
+        results = self.vote(indices).astype(np.float32).reshape(-1, 1)
+        neighbours = self.responses.view()[indices].astype(np.float32)
+        neighbours[indices < 0] = np.nan
+        return float(results[0, 0]), results, neighbours, (distances ** 2).astype(np.float32)